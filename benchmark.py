@@ -0,0 +1,301 @@
+"""
+eCourts Benchmark Suite
+End-to-end throughput benchmark against the local mock server
+
+Reports courts/minute, p50/p95 per-court latency and peak memory (Python plus
+browser processes) for single-court and bulk modes.
+
+Usage:
+    python benchmark.py --mode both --courts 6 --rows 200 --workers 3 --latency 0.1
+"""
+
+import sys
+import json
+import math
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import concurrent.futures
+from datetime import date
+from pathlib import Path
+import psutil
+import pytesseract
+from mock_server import MockECourtsServer, MockDataset
+from court_runner import create_new_driver, run_court, process_single_court, prime_profile_template
+from driver_cache import driver_cache, profile_template
+from metrics import metrics
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from tab_pool import TabPool
+from ocr_service import ocr_client
+from case_index import case_index
+
+logger = logging.getLogger(__name__)
+
+
+class PeakMemorySampler:
+    """Samples RSS of this process and all its descendants (Chrome included)"""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        root = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            self.peak_bytes = max(self.peak_bytes, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(mode, latencies, successes, total, elapsed, peak_bytes):
+    """Build the result record for one benchmark mode"""
+    return {
+        'mode': mode,
+        'courts': total,
+        'success': successes,
+        'elapsed_seconds': round(elapsed, 2),
+        'courts_per_minute': round(total / elapsed * 60, 2) if elapsed else 0.0,
+        'p50_seconds': round(percentile(latencies, 0.50), 2),
+        'p95_seconds': round(percentile(latencies, 0.95), 2),
+        'peak_memory_mb': round(peak_bytes / (1024 * 1024), 1),
+        'network': resource_blocker.report(),
+        'phases': metrics.phase_table(),
+    }
+
+
+def bench_single(server, court_infos, selected_date, output_dir):
+    """Single court mode: one long-lived driver processes courts one by one"""
+    metrics.reset()
+    resource_blocker.reset()
+    latencies, successes = [], 0
+    with PeakMemorySampler() as sampler:
+        start = time.perf_counter()
+        driver = create_new_driver()
+        if not driver:
+            raise RuntimeError("Driver creation failed")
+        try:
+            for info in court_infos:
+                court_start = time.perf_counter()
+                try:
+                    result = run_court(driver, info, selected_date, server.url, output_dir)
+                except Exception as e:
+                    logger.warning(f"{info['court_name']} failed: {e}")
+                    result = None
+                resource_blocker.collect(driver)
+                latencies.append(time.perf_counter() - court_start)
+                successes += 1 if result else 0
+        finally:
+            supervisor.release(driver)
+        elapsed = time.perf_counter() - start
+    return summarize('single', latencies, successes, len(court_infos), elapsed, sampler.peak_bytes)
+
+
+def bench_bulk(server, court_infos, selected_date, output_dir, workers, split=False):
+    """Bulk mode: thread pool with one fresh driver per court, as in the UI"""
+    metrics.reset()
+    resource_blocker.reset()
+    with PeakMemorySampler() as sampler:
+        start = time.perf_counter()
+        job = supervisor.start_job()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda info: process_single_court(info, selected_date, url=server.url, output_dir=output_dir,
+                                                  split_case_types=split, job=job),
+                court_infos))
+        elapsed = time.perf_counter() - start
+        supervisor.finish_job(job)
+    latencies = [r['seconds'] for r in results]
+    successes = sum(1 for r in results if r['status'] == 'success')
+    report = summarize('bulk (split)' if split else 'bulk', latencies, successes, len(court_infos),
+                       elapsed, sampler.peak_bytes)
+    report['workers'] = workers
+    return report
+
+
+def bench_tabs(server, court_infos, selected_date, output_dir, workers, tabs, split=False):
+    """Tab mode: a few browsers each hosting several isolated tabs"""
+    metrics.reset()
+    resource_blocker.reset()
+    with PeakMemorySampler() as sampler:
+        start = time.perf_counter()
+        job = supervisor.start_job()
+        pool = TabPool(browsers=workers, tabs_per_browser=tabs, url=server.url, output_dir=output_dir,
+                       split_case_types=split, job=job).start()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=pool.size) as executor:
+                results = list(executor.map(lambda info: pool.process_court(info, selected_date), court_infos))
+        finally:
+            pool.close()
+        elapsed = time.perf_counter() - start
+        supervisor.finish_job(job)
+    latencies = [r['seconds'] for r in results]
+    successes = sum(1 for r in results if r['status'] == 'success')
+    report = summarize(f'tabs x{tabs}', latencies, successes, len(court_infos), elapsed, sampler.peak_bytes)
+    report['workers'] = workers
+    return report
+
+
+def bench_launch(server, launches):
+    """Browser launch latency: uncached patching vs cached driver vs cached driver plus warm profile"""
+    reports = []
+    for label, cached, warm in [('launch (uc default)', False, False),
+                                ('launch (cached driver)', True, False),
+                                ('launch (cached driver + warm profile)', True, True)]:
+        driver_cache.enabled, profile_template.enabled = cached, warm
+        if warm and not prime_profile_template(server.url):
+            logger.warning("Profile priming failed, warm profile numbers use an empty profile")
+        metrics.reset()
+        resource_blocker.reset()
+        launch_times, load_times, successes = [], [], 0
+        with PeakMemorySampler() as sampler:
+            start = time.perf_counter()
+            for _ in range(launches):
+                launch_start = time.perf_counter()
+                driver = create_new_driver()
+                if not driver:
+                    continue
+                launch_times.append(time.perf_counter() - launch_start)
+                try:
+                    load_start = time.perf_counter()
+                    driver.get(server.url)
+                    load_times.append(time.perf_counter() - load_start)
+                    successes += 1
+                finally:
+                    supervisor.release(driver)
+            elapsed = time.perf_counter() - start
+        report = summarize(label, launch_times, successes, launches, elapsed, sampler.peak_bytes)
+        report['first_load_p50_seconds'] = round(percentile(load_times, 0.50), 2)
+        reports.append(report)
+    driver_cache.enabled = profile_template.enabled = True
+    return reports
+
+
+def print_report(report):
+    print(f"\n=== {report['mode']} mode ===")
+    for key in ('courts', 'success', 'elapsed_seconds', 'courts_per_minute',
+                'p50_seconds', 'p95_seconds', 'first_load_p50_seconds', 'peak_memory_mb'):
+        if key in report:
+            print(f"{key:>22}: {report[key]}")
+    if report['phases']:
+        print(f"{'phase':>20}  {'count':>6}  {'p50 (s)':>8}  {'p95 (s)':>8}  {'total (s)':>9}")
+        for row in report['phases']:
+            print(f"{row['phase']:>20}  {row['count']:>6}  {row['p50 (s)']:>8}  "
+                  f"{row['p95 (s)']:>8}  {row['total (s)']:>9}")
+    network = report['network']
+    print(f"{'network':>22}: {network['requests_loaded']} requests / {network['bytes_loaded']} bytes loaded, "
+          f"{network['requests_blocked']} blocked, ~{network['bytes_saved']} bytes saved")
+
+
+def compare_blocking(server, court_infos, selected_date, output_dir, workers):
+    """Run bulk mode without and then with resource blocking"""
+    resource_blocker.enabled = True
+    resource_blocker.blocked, saved_patterns = [], resource_blocker.blocked
+    baseline = bench_bulk(server, court_infos, selected_date, output_dir, workers)
+    baseline['mode'] = 'bulk (no blocking)'
+    resource_blocker.blocked = saved_patterns
+    blocked = bench_bulk(server, court_infos, selected_date, output_dir, workers)
+    blocked['mode'] = 'bulk (blocking)'
+    return [baseline, blocked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end eCourts scraper benchmark against the mock server")
+    parser.add_argument("--mode", choices=["single", "bulk", "both", "blocking", "tabs", "launch"], default="both",
+                        help="'blocking' compares bulk mode with and without resource blocking; "
+                             "'tabs' runs bulk mode on a tab pool; 'launch' times browser start-up "
+                             "(--courts is the number of launches)")
+    parser.add_argument("--courts", type=int, default=6, help="Number of courts to process")
+    parser.add_argument("--rows", type=int, default=50, help="Approximate rows per cause list")
+    parser.add_argument("--workers", type=int, default=3, help="Bulk mode thread (or tab mode browser) count")
+    parser.add_argument("--tabs", type=int, default=3, help="Tabs per browser in tab mode")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--accept-any-captcha", action="store_true",
+                        help="Skip captcha verification so OCR accuracy does not affect throughput")
+    parser.add_argument("--tesseract", help="Path to tesseract binary (default: found on PATH)")
+    parser.add_argument("--no-block", action="store_true", help="Disable network resource blocking")
+    parser.add_argument("--no-ocr-service", action="store_true",
+                        help="Run OCR inside each worker instead of the shared OCR service")
+    parser.add_argument("--split", action="store_true",
+                        help="Fetch civil and criminal lists concurrently in bulk and tab modes")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    tesseract = args.tesseract or shutil.which("tesseract")
+    if tesseract:
+        pytesseract.pytesseract.tesseract_cmd = tesseract
+    resource_blocker.enabled = not args.no_block
+    case_index.enabled = False  # keep mock listings out of the real search index
+    ocr_client.enabled = not args.no_ocr_service
+    ocr_client.start()
+
+    dataset = MockDataset(courts=max(1, args.courts), rows=args.rows)
+    server = MockECourtsServer(dataset=dataset, latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, accept_any_captcha=args.accept_any_captcha).start()
+    resource_blocker.essential_urls += server.essential_urls
+    court_infos = dataset.court_infos()[:args.courts]
+    output_dir = Path(tempfile.mkdtemp(prefix="ecourts_bench_"))
+    reports = []
+    try:
+        if args.mode in ("single", "both"):
+            reports.append(bench_single(server, court_infos, date.today(), output_dir))
+        if args.mode in ("bulk", "both"):
+            reports.append(bench_bulk(server, court_infos, date.today(), output_dir, args.workers, args.split))
+        if args.mode == "launch":
+            reports.extend(bench_launch(server, args.courts))
+        if args.mode == "tabs":
+            reports.append(bench_tabs(server, court_infos, date.today(), output_dir, args.workers, args.tabs,
+                                      args.split))
+        if args.mode == "blocking":
+            reports.extend(compare_blocking(server, court_infos, date.today(), output_dir, args.workers))
+    finally:
+        server.stop()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    for report in reports:
+        print_report(report)
+    print(f"\nserver: {server.stats}")
+    ocr_stats = ocr_client.stats() if ocr_client.enabled else None
+    if ocr_stats:
+        print(f"ocr service ({ocr_stats['engine']}): {ocr_stats['requests']} requests, "
+              f"mean batch {ocr_stats['batch_size']['mean']}, p50/p95 latency "
+              f"{ocr_stats['latency_seconds']['p50']}/{ocr_stats['latency_seconds']['p95']}s, "
+              f"{ocr_stats['stack_fallbacks']} stack fallbacks")
+    ocr_client.stop()
+    if args.json:
+        Path(args.json).write_text(json.dumps({'reports': reports, 'server': server.stats, 'ocr': ocr_stats},
+                                              indent=2))
+    return 0 if all(r['success'] for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+eCourts Browser Supervisor Module
+Tracks launched Chrome process trees, enforces RSS budgets, reaps orphans and gates worker admission
+"""
+
+import os
+import time
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+import psutil
+from metrics import metrics
+from driver_cache import profile_template
+
+logger = logging.getLogger(__name__)
+
+OWNER_SWITCH = "--ecourts-owner"
+PROFILE_SWITCH = "--user-data-dir"
+BROWSER_RSS_BUDGET_MB = 800
+TOTAL_RSS_BUDGET_MB = 3000
+MEMORY_RESERVE_MB = 1024
+WATCHDOG_INTERVAL = 5
+QUIT_GRACE_SECONDS = 3
+MB = 1024 * 1024
+
+
+class BrowserSupervisor:
+    """Supervises every browser launched by this process"""
+
+    def __init__(self, browser_budget_mb=BROWSER_RSS_BUDGET_MB, total_budget_mb=TOTAL_RSS_BUDGET_MB,
+                 reserve_mb=MEMORY_RESERVE_MB, interval=WATCHDOG_INTERVAL):
+        self.browser_budget = browser_budget_mb * MB
+        self.total_budget = total_budget_mb * MB
+        self.reserve = reserve_mb * MB
+        self.interval = interval
+        self.browsers = {}
+        self.admitted = 0
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._watchdog = None
+        self._jobs = itertools.count(1)
+
+    # ---------- launch and tracking ----------
+    def tag_options(self, options):
+        """Mark Chrome command line with owner pid so orphans can be found later"""
+        options.add_argument(f"{OWNER_SWITCH}={os.getpid()}")
+        return options
+
+    def start_job(self):
+        """Token identifying the browsers of one bulk job (pass to register and finish_job)"""
+        with self._lock:
+            return next(self._jobs)
+
+    def register(self, driver, persistent=False, cleanup=None, job=None):
+        """Start tracking a driver's chromedriver and Chrome process tree
+
+        Args:
+            cleanup: Optional callable run after the browser is gone (e.g. delete its profile)
+            job: Token from start_job; finish_job(job) releases only that job's browsers
+        """
+        roots = []
+        for pid in (getattr(getattr(driver.service, 'process', None), 'pid', None),
+                    getattr(driver, 'browser_pid', None)):
+            if pid:
+                try:
+                    roots.append(psutil.Process(pid))
+                except psutil.NoSuchProcess:
+                    pass
+        with self._lock:
+            self.browsers[id(driver)] = {'driver': driver, 'roots': roots, 'persistent': persistent,
+                                         'started': time.time(), 'recycled': False, 'weight': 1,
+                                         'cleanup': cleanup, 'job': job}
+            metrics.increment("browsers_launched")
+        self._ensure_watchdog()
+        return driver
+
+    def set_weight(self, driver, weight):
+        """Scale the per-browser budget, e.g. by the number of tabs a browser hosts"""
+        with self._lock:
+            if id(driver) in self.browsers:
+                self.browsers[id(driver)]['weight'] = max(1, weight)
+
+    def _tree(self, entry):
+        procs = []
+        for root in entry['roots']:
+            try:
+                if root.is_running():
+                    procs.append(root)
+                    procs.extend(root.children(recursive=True))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return list({p.pid: p for p in procs}.values())
+
+    def rss(self, entry):
+        """Total RSS of one browser's process tree in bytes"""
+        total = 0
+        for proc in self._tree(entry):
+            try:
+                total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total
+
+    def was_recycled(self, driver):
+        """True if the watchdog killed this driver for exceeding its budget"""
+        with self._lock:
+            entry = self.browsers.get(id(driver))
+            return bool(entry and entry['recycled'])
+
+    # ---------- teardown ----------
+    def release(self, driver):
+        """Quit driver and kill anything left of its process tree"""
+        with self._lock:
+            entry = self.browsers.pop(id(driver), None)
+        procs = self._tree(entry) if entry else []
+        try:
+            driver.quit()
+        except Exception as e:
+            metrics.increment("browser_quit_failed")
+            logger.warning(f"driver.quit() failed, killing process tree: {e}")
+        self._kill(procs)
+        if entry and entry['cleanup']:
+            try:
+                entry['cleanup']()
+            except Exception as e:
+                logger.warning(f"Browser cleanup failed: {e}")
+        with self._cond:
+            self._cond.notify_all()
+
+    def release_all(self, include_persistent=False, job=None):
+        """Release tracked browsers, e.g. ones left behind by abandoned workers
+
+        Args:
+            job: Only release browsers registered with this job token (None releases all)
+        """
+        with self._lock:
+            drivers = [e['driver'] for e in self.browsers.values()
+                       if (include_persistent or not e['persistent']) and (job is None or e['job'] == job)]
+        for driver in drivers:
+            self.release(driver)
+        return len(drivers)
+
+    def _kill(self, procs):
+        if not procs:
+            return 0
+        _, alive = psutil.wait_procs(procs, timeout=QUIT_GRACE_SECONDS)
+        for proc in alive:
+            try:
+                proc.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        if alive:
+            metrics.increment("browser_processes_killed", len(alive))
+        return len(alive)
+
+    def reap_orphans(self):
+        """Kill tagged Chrome trees whose owner is gone and stray patched chromedrivers"""
+        victims, profiles = [], set()
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline']):
+            try:
+                cmdline = proc.info['cmdline'] or []
+                owner = next((arg.split('=', 1)[1] for arg in cmdline if arg.startswith(OWNER_SWITCH + '=')), None)
+                if owner is None or owner.isdigit() and psutil.pid_exists(int(owner)):
+                    profiles.update(arg.split('=', 1)[1] for arg in cmdline if arg.startswith(PROFILE_SWITCH + '='))
+                if owner is not None:
+                    if not owner.isdigit() or not psutil.pid_exists(int(owner)):
+                        victims.append(proc)
+                        victims.extend(proc.children(recursive=True))
+                elif 'chromedriver' in (proc.info['name'] or '') and 'undetected' in ' '.join(cmdline):
+                    ppid = proc.info['ppid']
+                    if ppid in (0, 1) or not psutil.pid_exists(ppid):
+                        victims.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        victims = list({p.pid: p for p in victims}.values())
+        for proc in victims:
+            try:
+                proc.terminate()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        self._kill(victims)
+        if victims:
+            metrics.increment("orphans_reaped", len(victims))
+            logger.warning(f"Reaped {len(victims)} orphaned browser processes")
+        # Profiles of reaped browsers, and of runs that died before they could delete theirs
+        profile_template.sweep(profiles)
+        return len(victims)
+
+    def finish_job(self, job):
+        """Cleanup after a bulk job: release its leftover browsers, then reap orphans
+
+        Browsers of other jobs (e.g. another Streamlit session's bulk run) are left alone.
+        """
+        return self.release_all(job=job) + self.reap_orphans()
+
+    # ---------- budgets ----------
+    def enforce(self):
+        """Recycle browsers over the per-browser budget, then the largest while over total budget"""
+        with self._lock:
+            entries = [e for e in self.browsers.values() if not e['recycled'] and not e['persistent']]
+        sizes = [(self.rss(e), e) for e in entries]
+        total = sum(size for size, _ in sizes)
+        victims = [e for size, e in sizes if size > self.browser_budget * e['weight']]
+        for size, entry in sorted(sizes, key=lambda item: item[0], reverse=True):
+            if total <= self.total_budget:
+                break
+            if not any(v is entry for v in victims):
+                victims.append(entry)
+            total -= size
+        for entry in victims:
+            self._recycle(entry)
+        return len(victims)
+
+    def _recycle(self, entry):
+        # Killing the tree makes the worker's next WebDriver call fail, so it retries with a fresh browser
+        with self._lock:
+            entry['recycled'] = True
+        logger.warning(f"Recycling browser over memory budget ({self.rss(entry) // MB} MB)")
+        metrics.increment("browsers_recycled")
+        procs = self._tree(entry)
+        for proc in procs:
+            try:
+                proc.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+    def _ensure_watchdog(self):
+        with self._lock:
+            if self._watchdog and self._watchdog.is_alive():
+                return
+            self._watchdog = threading.Thread(target=self._watch, daemon=True, name="browser-watchdog")
+            self._watchdog.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.enforce()
+            except Exception as e:
+                logger.error(f"Browser watchdog failed: {e}")
+
+    # ---------- admission ----------
+    def max_workers(self, requested):
+        """Worker count that fits in currently available memory"""
+        available = psutil.virtual_memory().available - self.reserve
+        by_memory = max(1, int(min(available, self.total_budget) // self.browser_budget))
+        return max(1, min(requested, by_memory))
+
+    def _can_admit(self):
+        if self.admitted == 0:
+            return True
+        available = psutil.virtual_memory().available - self.reserve
+        return (available >= self.browser_budget
+                and (self.admitted + 1) * self.browser_budget <= self.total_budget)
+
+    @contextmanager
+    def admit(self):
+        """Block until memory allows another worker browser"""
+        with self._cond:
+            waited = False
+            while not self._can_admit():
+                waited = True
+                self._cond.wait(timeout=1)
+            self.admitted += 1
+        if waited:
+            metrics.increment("admission_waits")
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.admitted -= 1
+                self._cond.notify_all()
+
+
+# Shared supervisor used by all workers
+supervisor = BrowserSupervisor()
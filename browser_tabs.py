@@ -0,0 +1,163 @@
+"""
+eCourts Browser Tabs Module
+Isolated tabs of one Chrome instance, each with its own browser context and tab-bound driver
+
+Every tab gets a driver that switches to its window before each WebDriver command, so
+commands are serialized per browser while the sleeps and server round trips of different
+tabs overlap. Separate browser contexts keep cookies, and therefore the eCourts session
+and captcha, apart.
+"""
+
+import time
+import logging
+import threading
+from selenium.webdriver.chromium.webdriver import ChromiumDriver
+from selenium.webdriver.remote.command import Command
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TAB_OPEN_TIMEOUT = 5
+# Per-driver helper objects (switch_to, network conditions, FedCM) created with a driver reference
+DRIVER_HELPERS = ("_switch_to", "_mobile", "_fedcm")
+
+
+class BrowserTab:
+    """One tab of a shared browser with its own browser context"""
+
+    def __init__(self, browser, handle, context_id):
+        self.browser = browser
+        self.handle = handle
+        self.context_id = context_id
+        self.driver = browser.bind(handle)
+
+    def alive(self):
+        """True if the tab still exists and answers scripts"""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+
+class TabBrowser:
+    """A single Chrome instance hosting several isolated tabs"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.tabs = []
+        self.isolated = True
+        self._lock = threading.RLock()
+        self._active = None
+        self._execute = driver.execute
+        self._blank_handle = driver.current_window_handle
+
+    def bind(self, handle):
+        """Return a driver whose every command runs against the given window"""
+        tab_driver = object.__new__(ChromiumDriver)
+        tab_driver.__dict__.update(self.driver.__dict__)
+        # Helpers holding a driver reference must point at the tab, not the base driver
+        for name in DRIVER_HELPERS:
+            if name in tab_driver.__dict__:
+                setattr(tab_driver, name, type(tab_driver.__dict__[name])(tab_driver))
+
+        def execute(command, params=None):
+            with self._lock:
+                if self._active != handle:
+                    self._execute(Command.SWITCH_TO_WINDOW, {'handle': handle})
+                    self._active = handle
+                # Run as the tab driver so returned elements use it as their parent and
+                # their own commands go through this window switch as well
+                return ChromiumDriver.execute(tab_driver, command, params)
+
+        tab_driver.execute = execute
+        tab_driver.quit = lambda: None  # tabs are closed through the browser
+        return tab_driver
+
+    def _handles(self):
+        return set(self._execute(Command.W3C_GET_WINDOW_HANDLES)['value'])
+
+    def open_tab(self):
+        """Open a tab in a fresh browser context; falls back to a shared-cookie tab"""
+        with self._lock:
+            before = self._handles()
+            context_id, handle = None, None
+            try:
+                context_id = self.driver.execute_cdp_cmd(
+                    "Target.createBrowserContext", {"disposeOnDetach": False})['browserContextId']
+                target_id = self.driver.execute_cdp_cmd(
+                    "Target.createTarget", {"url": "about:blank", "browserContextId": context_id})['targetId']
+                deadline = time.time() + TAB_OPEN_TIMEOUT
+                while time.time() < deadline and handle is None:
+                    new = self._handles() - before
+                    handle = target_id if target_id in new else next(iter(new), None)
+                    if handle is None:
+                        time.sleep(0.1)
+            except Exception as e:
+                logger.warning(f"Browser contexts unavailable: {e}")
+
+            if handle is None:
+                if context_id:
+                    self._dispose_context(context_id)
+                    context_id = None
+                if self.tabs:
+                    # Tabs sharing cookies would overwrite each other's captcha session
+                    self.isolated = False
+                    return None
+                handle = self._execute(Command.NEW_WINDOW, {'type': 'tab'})['value']['handle']
+
+            tab = BrowserTab(self, handle, context_id)
+            self.tabs.append(tab)
+        resource_blocker.apply(tab.driver)
+        supervisor.set_weight(self.driver, len(self.tabs))
+        return tab
+
+    def close_tab(self, tab):
+        """Close a tab and dispose of its browser context"""
+        with self._lock:
+            if tab in self.tabs:
+                self.tabs.remove(tab)
+            try:
+                self._execute(Command.SWITCH_TO_WINDOW, {'handle': tab.handle})
+                self._execute(Command.CLOSE)
+            except Exception:
+                pass
+            self._active = None
+            if tab.context_id:
+                self._dispose_context(tab.context_id)
+
+    def replace_tab(self, tab):
+        """Recover from a crashed tab by opening a new one in its place"""
+        metrics.increment("tabs_replaced")
+        self.close_tab(tab)
+        return self.open_tab()
+
+    def _dispose_context(self, context_id):
+        try:
+            with self._lock:
+                self._execute(Command.SWITCH_TO_WINDOW, {'handle': self._blank_handle})
+                self._active = self._blank_handle
+                self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception:
+            pass
+
+    def close(self):
+        """Close all tabs and return the driver to its original window"""
+        for tab in list(self.tabs):
+            self.close_tab(tab)
+        try:
+            with self._lock:
+                self._execute(Command.SWITCH_TO_WINDOW, {'handle': self._blank_handle})
+                self._active = self._blank_handle
+        except Exception:
+            pass
+        supervisor.set_weight(self.driver, 1)
+
+    def alive(self):
+        """True if the browser process still answers"""
+        try:
+            self._handles()
+            return True
+        except Exception:
+            return False
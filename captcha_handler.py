@@ -4,23 +4,37 @@ Handles CAPTCHA extraction, entry, and form submission
 """
 
 import time
+import base64
 import logging
 import pytesseract
-from PIL import Image
-import io
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from metrics import metrics
+from ocr_service import ocr_client as shared_ocr_client, recognize_local
 
 logger = logging.getLogger(__name__)
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 TIMEOUT_SHORT = 10
+# Copies the already loaded captcha <img> to a canvas; re-fetching its URL would issue a new captcha
+CAPTCHA_BYTES_JS = """
+    var img = arguments[0];
+    if (!img.complete || !img.naturalWidth) return null;
+    try {
+        var canvas = document.createElement('canvas');
+        canvas.width = img.naturalWidth;
+        canvas.height = img.naturalHeight;
+        canvas.getContext('2d').drawImage(img, 0, 0);
+        return canvas.toDataURL('image/png').split(',')[1];
+    } catch (e) { return null; }
+"""
 
 class CaptchaHandler:
     """Handles CAPTCHA operations"""
     
-    def __init__(self, driver):
+    def __init__(self, driver, ocr_client=None):
         self.driver = driver
+        self.ocr_client = ocr_client or shared_ocr_client
     
     def clear_modals(self):
         """Close modal dialogs"""
@@ -37,14 +51,28 @@ class CaptchaHandler:
         except:
             return False
     
+    def get_captcha_bytes(self, captcha_img):
+        """Original PNG bytes of the captcha image, or a screenshot of it as fallback"""
+        try:
+            encoded = self.driver.execute_script(CAPTCHA_BYTES_JS, captcha_img)
+            if encoded:
+                return base64.b64decode(encoded)
+        except Exception:
+            pass
+        metrics.increment("captcha_screenshot_fallback")
+        return captcha_img.screenshot_as_png
+
     def get_captcha_text(self):
-        """Extract CAPTCHA using OCR"""
+        """Extract CAPTCHA using OCR (shared service, in-process if unavailable)"""
         try:
             captcha_img = WebDriverWait(self.driver, TIMEOUT_SHORT).until(
                 EC.presence_of_element_located((By.ID, "captcha_image"))
             )
-            image = Image.open(io.BytesIO(captcha_img.screenshot_as_png))
-            text = pytesseract.image_to_string(image, config='--psm 7 --oem 3').strip()
+            image_bytes = self.get_captcha_bytes(captcha_img)
+            with metrics.timed("ocr"):
+                text = self.ocr_client.recognize(image_bytes) if self.ocr_client.enabled else None
+                if text is None:
+                    text = recognize_local(image_bytes)
             return text if len(text) > 2 else ""
         except:
             return ""
@@ -81,19 +109,25 @@ class CaptchaHandler:
     def submit_case_type(self, case_type):
         """Submit for civil ('civ') or criminal ('cri') cases"""
         try:
-            self.clear_modals()
-            time.sleep(1)
-            self.driver.execute_script(f"submit_causelist('{case_type}');")
-            time.sleep(3)
-            return not self.check_captcha_error()
+            with metrics.timed("captcha_submit"):
+                self.clear_modals()
+                time.sleep(1)
+                self.driver.execute_script(f"submit_causelist('{case_type}');")
+                time.sleep(3)
+                accepted = not self.check_captcha_error()
+            if not accepted:
+                metrics.increment("captcha_rejected")
+            return accepted
         except:
             return False
     
     def process_with_captcha(self, case_type, max_retries=3):
         """Process case type with automatic CAPTCHA retry"""
         for attempt in range(max_retries):
+            metrics.increment("captcha_attempts")
             captcha = self.get_captcha_text()
             if not captcha:
+                metrics.increment("captcha_ocr_empty")
                 time.sleep(1)
                 continue
             
@@ -107,5 +141,6 @@ class CaptchaHandler:
             
             self.clear_modals()
         
+        metrics.increment("captcha_failures")
         logger.warning(f"{case_type} cases failed after {max_retries} attempts")
         return False
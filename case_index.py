@@ -0,0 +1,216 @@
+"""
+eCourts Case Index Module
+SQLite FTS5 index of every scraped cause list row, queryable by advocate, party or case number
+"""
+
+import io
+import csv
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = Path("ecourts_pdfs") / "cause_lists.db"
+CASE_TYPES = {'civ': 'Civil', 'cri': 'Criminal'}
+EXPORT_COLUMNS = ['list_date', 'case_type', 'complex_name', 'court_name', 'stage', 'serial',
+                  'case_no', 'parties', 'advocate']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    state_code TEXT, dist_code TEXT, complex_code TEXT, complex_name TEXT,
+    court_value TEXT, court_name TEXT, judge TEXT,
+    list_date TEXT, case_type TEXT, stage TEXT, serial TEXT,
+    case_no TEXT, parties TEXT, advocate TEXT, ingested_at REAL
+);
+CREATE INDEX IF NOT EXISTS listings_court_date
+    ON listings (complex_code, court_value, list_date, case_type);
+CREATE INDEX IF NOT EXISTS listings_date ON listings (list_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+    case_no, parties, advocate, stage, court_name,
+    content='listings', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS listings_ai AFTER INSERT ON listings BEGIN
+    INSERT INTO listings_fts (rowid, case_no, parties, advocate, stage, court_name)
+    VALUES (new.id, new.case_no, new.parties, new.advocate, new.stage, new.court_name);
+END;
+CREATE TRIGGER IF NOT EXISTS listings_ad AFTER DELETE ON listings BEGIN
+    INSERT INTO listings_fts (listings_fts, rowid, case_no, parties, advocate, stage, court_name)
+    VALUES ('delete', old.id, old.case_no, old.parties, old.advocate, old.stage, old.court_name);
+END;
+"""
+
+
+def fts_query(text, column=None):
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix"""
+    terms = [f'"{word.replace(chr(34), chr(34) * 2)}"*' for word in text.split()]
+    if not terms:
+        return None
+    query = " ".join(terms)
+    return f"{column} : ({query})" if column else query
+
+
+class CaseIndex:
+    """Full-text index of cause list rows keyed by court, date and case type"""
+
+    def __init__(self, path=INDEX_PATH, enabled=True):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    # ---------- ingestion ----------
+    def ingest(self, court_info, selected_date, case_type, case_data):
+        """Replace the stored rows of one court, date and case type
+
+        Args:
+            court_info: Court dict as used by court_runner (optionally with 'complex_name')
+            case_type: 'civ' or 'cri'
+            case_data: Tuple of (heading_data, table_data) from DataExtractor.extract_case_data
+
+        Returns:
+            int: Number of rows indexed
+        """
+        if not case_data or not case_data[0]:
+            return 0
+        heading, table_data = case_data
+        list_date = selected_date.strftime('%Y-%m-%d')
+        now, indexed = time.time(), 0
+
+        def rows():
+            # Streamed into executemany so a spooled cause list is never loaded whole
+            nonlocal indexed
+            stage = ''
+            for row in table_data or []:
+                if row['type'] == 'header':
+                    stage = row['text']
+                    continue
+                cells = (row['cells'] + [''] * 4)[:4]
+                if not any(ch.isdigit() for ch in cells[0]):
+                    continue  # column header row
+                indexed += 1
+                yield (court_info['state_code'], court_info['dist_code'], court_info['complex_code'],
+                       court_info.get('complex_name', ''), court_info['court_value'], court_info['court_name'],
+                       heading.get('judge_info', ''), list_date, case_type, stage,
+                       cells[0], cells[1], cells[2], cells[3], now)
+
+        with metrics.timed("index_ingest"), self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM listings WHERE complex_code = ? AND court_value = ? "
+                                 "AND list_date = ? AND case_type = ?",
+                                 (court_info['complex_code'], court_info['court_value'], list_date, case_type))
+                    conn.executemany(
+                        "INSERT INTO listings (state_code, dist_code, complex_code, complex_name, court_value, "
+                        "court_name, judge, list_date, case_type, stage, serial, case_no, parties, advocate, "
+                        "ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+            finally:
+                conn.close()
+        metrics.increment("rows_indexed", indexed)
+        return indexed
+
+    def ingest_court(self, court_info, selected_date, civil_data, criminal_data):
+        """Index both case types of a court; failures are logged, never raised"""
+        if not self.enabled:
+            return 0
+        try:
+            return (self.ingest(court_info, selected_date, 'civ', civil_data)
+                    + self.ingest(court_info, selected_date, 'cri', criminal_data))
+        except Exception as e:
+            logger.error(f"Indexing {court_info['court_name']} failed: {e}")
+            return 0
+
+    # ---------- queries ----------
+    def search(self, text, column=None, list_date=None, complex_codes=None, case_type=None, limit=1000):
+        """Full-text search, optionally restricted to one column, date, complexes and case type
+
+        Args:
+            column: None for all columns, or 'advocate', 'parties', 'case_no'
+            list_date: date object or None for all dates
+            complex_codes: Iterable of complex codes, or None for all
+            case_type: 'civ', 'cri' or None
+
+        Returns:
+            list: Row dicts ordered by date, court and serial number
+        """
+        query = fts_query(text, column)
+        if not query:
+            return []
+        sql = ("SELECT l.* FROM listings_fts f JOIN listings l ON l.id = f.rowid "
+               "WHERE listings_fts MATCH ?")
+        params = [query]
+        if list_date:
+            sql += " AND l.list_date = ?"
+            params.append(list_date.strftime('%Y-%m-%d'))
+        if complex_codes:
+            complex_codes = list(complex_codes)
+            sql += f" AND l.complex_code IN ({', '.join('?' * len(complex_codes))})"
+            params.extend(complex_codes)
+        if case_type:
+            sql += " AND l.case_type = ?"
+            params.append(case_type)
+        sql += " ORDER BY l.list_date, l.complex_name, l.court_name, l.case_type, CAST(l.serial AS INTEGER) LIMIT ?"
+        params.append(limit)
+
+        with metrics.timed("index_query"):
+            conn = self._connect()
+            try:
+                return [dict(row) for row in conn.execute(sql, params)]
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Search failed for {text!r}: {e}")
+                return []
+            finally:
+                conn.close()
+
+    def advocate_diary(self, advocate, list_date=None, complex_codes=None):
+        """All matters listed for an advocate, across courts and complexes"""
+        return self.search(advocate, 'advocate', list_date, complex_codes)
+
+    def complexes(self):
+        """Indexed court complexes as {complex_name or code: complex_code}"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT DISTINCT complex_code, complex_name FROM listings ORDER BY complex_name")
+            return {(row['complex_name'] or row['complex_code']): row['complex_code'] for row in rows}
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Row, court and date counts in the index"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT COUNT(*) AS rows_, COUNT(DISTINCT complex_code || '|' || court_value) AS courts, "
+                               "COUNT(DISTINCT list_date) AS dates FROM listings").fetchone()
+            return {'rows': row['rows_'], 'courts': row['courts'], 'dates': row['dates']}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def to_csv(rows):
+        """Export search results as CSV text"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, 'case_type': CASE_TYPES.get(row['case_type'], row['case_type'])})
+        return buffer.getvalue()
+
+
+# Shared index used by scraping workers and the UI
+case_index = CaseIndex()
@@ -0,0 +1,278 @@
+"""
+eCourts Court Runner Module
+Browser creation and per-court processing shared by the Streamlit UI and the benchmark suite
+"""
+
+import re
+import time
+import logging
+import itertools
+import concurrent.futures
+from pathlib import Path
+import undetected_chromedriver as uc
+from dropdown_manager import DropdownManager
+from captcha_handler import CaptchaHandler
+from data_extractor import DataExtractor, CourtProcessor
+from metrics import metrics
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from driver_cache import driver_cache, profile_template
+from browser_tabs import TabBrowser
+from case_index import case_index
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = Path("ecourts_pdfs")
+TIMEOUT_LONG = 15
+ECOURTS_URL = "https://services.ecourts.gov.in/ecourtindia_v6/?p=cause_list/"
+RETRY_ERROR = 'Tried multiple times, unable to get. Try refreshing page and try again.'
+
+
+def create_new_driver(persistent=False, user_data_dir=None, job=None):
+    """Create Chrome driver instance using undetected-chromedriver
+
+    Args:
+        persistent: Long-lived driver (UI main driver) that is never recycled or released after a job
+        user_data_dir: Explicit profile directory; by default a clone of the pre-warmed template is used
+        job: Supervisor job token of the bulk job this browser belongs to
+    """
+    profile_dir = None
+    try:
+        options = uc.ChromeOptions()
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--headless=new")  # Use new headless mode
+        # Keep timers and XHR callbacks running in background tabs (tab pool mode)
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-renderer-backgrounding")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+        supervisor.tag_options(options)
+        if not persistent:
+            resource_blocker.configure_options(options)
+        with metrics.timed("driver_create"):
+            driver_path = driver_cache.driver_path()
+            if not user_data_dir:
+                profile_dir = profile_template.clone()
+            driver = uc.Chrome(options=options, version_main=driver_cache.version_main,
+                               driver_executable_path=driver_path, user_data_dir=user_data_dir or profile_dir)
+        cleanup = (lambda: profile_template.discard(profile_dir)) if profile_dir else None
+        supervisor.register(driver, persistent=persistent, cleanup=cleanup, job=job)
+        resource_blocker.apply(driver)
+        driver.set_page_load_timeout(TIMEOUT_LONG)
+        driver.implicitly_wait(2)
+        return driver
+    except Exception as e:
+        logger.error(f"Driver creation failed: {e}")
+        profile_template.discard(profile_dir)
+        return None
+
+
+def prime_profile_template(url=ECOURTS_URL):
+    """Build the pre-warmed profile template by loading the site once (no-op while fresh)"""
+    if not profile_template.enabled or profile_template.ready():
+        return True
+    staging = profile_template.staging_dir()
+    driver = create_new_driver(user_data_dir=str(staging))
+    if not driver:
+        profile_template.discard(staging)
+        return False
+    try:
+        with metrics.timed("profile_prime"):
+            driver.get(url)
+            time.sleep(3)
+    except Exception as e:
+        logger.warning(f"Profile priming failed: {e}")
+        supervisor.release(driver)
+        profile_template.discard(staging)
+        return False
+    supervisor.release(driver)
+    return profile_template.commit(staging)
+
+
+def count_rows(*case_data):
+    """Count data rows across (heading_data, table_data) tuples"""
+    return sum(data[1].data_rows if hasattr(data[1], 'data_rows')
+               else sum(1 for row in data[1] if row['type'] == 'data')
+               for data in case_data if data and data[1])
+
+
+def safe_pdf_path(court_name, selected_date, output_dir=OUTPUT_DIR):
+    """Build the PDF path for a court and date"""
+    safe_filename = re.sub(r'[<>:"/\\|?*]', '_', court_name)
+    return Path(output_dir) / f"{safe_filename}_{selected_date.strftime('%Y%m%d')}.pdf"
+
+
+def open_court(driver, court_info, selected_date, url=ECOURTS_URL):
+    """Load the cause list page and select court and date"""
+    with metrics.timed("page_load"):
+        driver.get(url)
+    time.sleep(2)
+
+    return DropdownManager(driver).setup_navigation(
+        court_info['state_code'], court_info['dist_code'],
+        court_info['complex_code'], court_info['court_value'], selected_date
+    )
+
+
+def write_court_pdf(civil_data, criminal_data, court_info, selected_date, output_dir=OUTPUT_DIR):
+    """Index the rows, render the PDF and build the success result, or None if rendering failed"""
+    case_index.ingest_court(court_info, selected_date, civil_data, criminal_data)
+    pdf_path = safe_pdf_path(court_info['court_name'], selected_date, output_dir)
+
+    if DataExtractor.create_pdf(civil_data, criminal_data, str(pdf_path), court_info['court_name']):
+        return {'status': 'success', 'court': court_info['court_name'], 'file': str(pdf_path),
+                'rows': count_rows(civil_data, criminal_data)}
+    return None
+
+
+def fetch_court(driver, court_info, selected_date, url=ECOURTS_URL):
+    """Fetch civil and criminal lists of one court without writing anything
+
+    Returns:
+        Tuple: (civil_data, criminal_data), or None if navigation failed
+    """
+    if not open_court(driver, court_info, selected_date, url):
+        return None
+    return CourtProcessor(driver).process_cases(CaptchaHandler(driver))
+
+
+def run_court(driver, court_info, selected_date, url=ECOURTS_URL, output_dir=OUTPUT_DIR):
+    """Single attempt for one court on an existing driver
+
+    Returns:
+        dict: success result, or None if the attempt should be retried
+    """
+    fetched = fetch_court(driver, court_info, selected_date, url)
+    if fetched is None:
+        return None
+    return write_court_pdf(*fetched, court_info, selected_date, output_dir)
+
+
+def fetch_case_type(driver, court_info, selected_date, case_type, url=ECOURTS_URL, side_retries=2):
+    """Fetch one case type on its own session, reloading the page between tries
+
+    Returns:
+        Tuple: (heading_data, table_data), or None if this case type could not be fetched
+    """
+    for side_attempt in range(1, side_retries + 1):
+        try:
+            if open_court(driver, court_info, selected_date, url):
+                data = CourtProcessor(driver).process_case_type(CaptchaHandler(driver), case_type)
+                if data is not None:
+                    return data
+        except Exception as e:
+            logger.warning(f"{court_info['court_name']} {case_type} try {side_attempt} failed: {e}")
+    metrics.increment("case_type_failures")
+    return None
+
+
+def run_court_split(drivers, court_info, selected_date, url=ECOURTS_URL, output_dir=OUTPUT_DIR):
+    """Single attempt fetching civil and criminal lists concurrently on two sessions
+
+    Args:
+        drivers: Two drivers with independent eCourts sessions (civil, criminal)
+
+    Returns:
+        dict: success result, or None if both case types failed and the attempt should be retried
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        civil_future = executor.submit(fetch_case_type, drivers[0], court_info, selected_date, 'civ', url)
+        criminal_future = executor.submit(fetch_case_type, drivers[1], court_info, selected_date, 'cri', url)
+        civil_data, criminal_data = civil_future.result(), criminal_future.result()
+
+    if civil_data is None and criminal_data is None:
+        return None
+    if civil_data is None or criminal_data is None:
+        logger.warning(f"{court_info['court_name']}: only one case type could be fetched")
+    return write_court_pdf(civil_data, criminal_data, court_info, selected_date, output_dir)
+
+
+def open_session_pair(driver):
+    """Two isolated tabs on one browser for split fetching, or None if isolation is unavailable"""
+    browser = TabBrowser(driver)
+    tabs = [browser.open_tab(), browser.open_tab()]
+    if None in tabs:
+        browser.close()
+        return None
+    return browser
+
+
+def process_single_court(court_info, selected_date, max_retries=3, url=ECOURTS_URL, output_dir=OUTPUT_DIR,
+                         split_case_types=False, job=None):
+    """Process single court with own driver - retry 3 times on failure
+
+    Args:
+        split_case_types: Fetch civil and criminal lists concurrently in two isolated tabs
+        job: Supervisor job token from supervisor.start_job()
+    """
+    start = time.perf_counter()
+    with supervisor.admit():
+        result = _process_single_court(court_info, selected_date, max_retries, url, output_dir,
+                                       split_case_types, job)
+    return finish_court(court_info, result, start, max_retries)
+
+
+def finish_court(court_info, result, start, max_retries):
+    """Add seconds, attempts and rows to the result and record them in the metrics aggregates"""
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    result.setdefault('attempts', max_retries)
+    result.setdefault('rows', 0)
+    metrics.record_court(result['status'], result['seconds'], result['attempts'], result['rows'])
+    return result
+
+
+def run_courts(process_court, court_infos, selected_date, workers):
+    """Run courts on a thread pool, keeping at most two per worker queued
+
+    Yields (court_info, future) as courts finish, so memory does not grow with the court count.
+    Closing the generator early cancels the queued courts and waits for the running ones.
+    """
+    court_infos = iter(court_infos)
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                for info in itertools.islice(court_infos, 2 * workers - len(pending)):
+                    pending[executor.submit(process_court, info, selected_date)] = info
+                if not pending:
+                    return
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _process_single_court(court_info, selected_date, max_retries, url, output_dir, split_case_types, job):
+    for attempt in range(1, max_retries + 1):
+        driver = None
+        try:
+            driver = create_new_driver(job=job)
+            if driver:
+                pair = open_session_pair(driver) if split_case_types else None
+                if pair:
+                    drivers = [tab.driver for tab in pair.tabs]
+                    result = run_court_split(drivers, court_info, selected_date, url, output_dir)
+                else:
+                    result = run_court(driver, court_info, selected_date, url, output_dir)
+                if result:
+                    result['attempts'] = attempt
+                    return result
+        except Exception as e:
+            metrics.increment("court_exceptions")
+            if driver and supervisor.was_recycled(driver):
+                logger.warning(f"{court_info['court_name']} attempt {attempt}: browser recycled over memory budget")
+            else:
+                logger.warning(f"{court_info['court_name']} attempt {attempt} failed: {e}")
+        finally:
+            if driver:
+                resource_blocker.collect(driver)
+                supervisor.release(driver)
+
+        if attempt < max_retries:
+            time.sleep(1)
+
+    return {'status': 'error', 'court': court_info['court_name'], 'error': RETRY_ERROR}
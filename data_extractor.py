@@ -5,6 +5,7 @@ Handles data extraction from web pages and PDF generation
 
 import time
 import re
+import itertools
 import logging
 from pathlib import Path
 from bs4 import BeautifulSoup
@@ -13,14 +14,129 @@ from selenium.webdriver.support.ui import WebDriverWait
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Flowable
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER
+from metrics import metrics
+from spool import RowSpool
 
 logger = logging.getLogger(__name__)
 
 TIMEOUT_SHORT = 10
 TIMEOUT_LONG = 15
+# Table rows pulled from the browser per round trip, and rows read at a time while laying out a PDF page
+EXTRACT_CHUNK_ROWS = 200
+PDF_TABLE_CHUNK_ROWS = 25
+
+# Heading <center> blocks without the (possibly huge) cause list table
+HEADINGS_JS = """
+    return Array.from(document.getElementsByTagName('center')).map(function (center) {
+        var copy = center.cloneNode(true);
+        copy.querySelectorAll('#dispTable').forEach(function (t) { t.remove(); });
+        return copy.outerHTML;
+    }).join('');
+"""
+ROW_COUNT_JS = "var t = document.getElementById('dispTable'); return t ? t.rows.length : -1;"
+ROW_CHUNK_JS = """
+    var rows = document.getElementById('dispTable').rows, html = [];
+    for (var i = arguments[0]; i < Math.min(arguments[1], rows.length); i++) html.push(rows[i].outerHTML);
+    return html.join('');
+"""
+
+
+class LazyStory:
+    """List-like flowable source for doc.build that pulls flowables from a generator on demand
+
+    Supports what the platypus build loop uses (len, indexing, del [0], slice and insert at
+    the front), so only the flowables of the current page are held in memory.
+    """
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        self._buffer = []
+        self._exhausted = False
+
+    def _fill(self, size):
+        while len(self._buffer) < size and not self._exhausted:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._exhausted = True
+
+    def __len__(self):
+        self._fill(1)
+        return len(self._buffer) + (0 if self._exhausted else 1)
+
+    def __getitem__(self, index):
+        self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._fill(index.stop or 0)
+        else:
+            self._fill(index + 1)
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        self._fill(index + 1)
+        del self._buffer[index]
+
+    def insert(self, index, value):
+        self._fill(index)
+        self._buffer.insert(index, value)
+
+
+class LazyTable(Flowable):
+    """Cause list table that reads its rows only as pages are laid out
+
+    Splits like one Table with repeatRows=1: each page gets a Table of the column header and
+    the rows that fit, and the rest stays in the row iterator, so pages match a full Table.
+    """
+
+    def __init__(self, column_header, rows, cell_style):
+        super().__init__()
+        self.column_header = column_header
+        self.rows = iter(rows)
+        self.cell_style = cell_style
+        self._buffer = []
+        self._exhausted = False
+        self._table = None
+
+    def _read(self):
+        chunk = list(itertools.islice(self.rows, PDF_TABLE_CHUNK_ROWS))
+        self._buffer.extend(chunk)
+        self._exhausted = len(chunk) < PDF_TABLE_CHUNK_ROWS
+
+    def _build(self, avail_width, avail_height):
+        """Table of the buffered rows, read until it overflows the frame or the rows run out"""
+        if not self._buffer:
+            self._read()
+        while True:
+            table = DataExtractor._table([self.column_header] + self._buffer, self.cell_style)
+            _, height = table.wrap(avail_width, avail_height)
+            if height > avail_height or self._exhausted:
+                self._table = table
+                return height
+            self._read()
+
+    def wrap(self, avail_width, avail_height):
+        height = self._build(avail_width, avail_height)
+        self.width = self._table._width
+        self.height = height
+        return self.width, height
+
+    def split(self, avail_width, avail_height):
+        self._build(avail_width, avail_height)
+        parts = self._table.split(avail_width, avail_height)
+        if not parts:
+            return []
+        placed = len(parts[0]._cellvalues) - 1
+        rest = LazyTable(self.column_header, itertools.chain(self._buffer[placed:], self.rows), self.cell_style)
+        return [parts[0], rest]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._table.drawOn(canvas, x, y, _sW)
 
 
 class DataExtractor:
@@ -31,6 +147,10 @@ class DataExtractor:
 
     def extract_case_data(self):
         """Extract case data from loaded page"""
+        with metrics.timed("extract"):
+            return self._extract_case_data()
+
+    def _extract_case_data(self):
         try:
             WebDriverWait(self.driver, TIMEOUT_LONG).until(
                 lambda d: d.execute_script("return document.readyState") == "complete"
@@ -40,7 +160,7 @@ class DataExtractor:
                 return None, None
 
             time.sleep(2)
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            soup = BeautifulSoup(self.driver.execute_script(HEADINGS_JS) or '', 'html.parser')
 
             heading_data = {'court_name': '', 'judge_info': '', 'designation': '', 'case_type_date': ''}
 
@@ -60,12 +180,33 @@ class DataExtractor:
                     if match:
                         heading_data['case_type_date'] = match.group(0)
 
-            table = soup.find('table', {'id': 'dispTable'})
-            if not table:
+            table_data = self.extract_rows()
+            if table_data is None:
                 return heading_data, None
 
-            table_data = []
-            for row in table.find_all('tr'):
+            metrics.increment("rows_extracted", table_data.data_rows)
+            if table_data.spilled:
+                metrics.increment("row_spools_spilled")
+            return heading_data, table_data if table_data else None
+
+        except Exception as e:
+            logger.error(f"Extract case data failed: {e}")
+            return None, None
+
+    def extract_rows(self):
+        """Stream dispTable rows from the browser in chunks into a RowSpool
+
+        Returns:
+            RowSpool: Header and data rows, or None if the table is missing
+        """
+        total = self.driver.execute_script(ROW_COUNT_JS)
+        if total < 0:
+            return None
+
+        table_data = RowSpool()
+        for start in range(0, total, EXTRACT_CHUNK_ROWS):
+            chunk = self.driver.execute_script(ROW_CHUNK_JS, start, start + EXTRACT_CHUNK_ROWS)
+            for row in BeautifulSoup(f"<table>{chunk}</table>", 'html.parser').find_all('tr'):
                 cols = row.find_all(['td', 'th'])
                 if not cols:
                     continue
@@ -79,12 +220,7 @@ class DataExtractor:
                     row_data = [col.get_text(strip=True) for col in cols]
                     if any(row_data):
                         table_data.append({'type': 'data', 'cells': row_data})
-
-            return heading_data, table_data if table_data else None
-
-        except Exception as e:
-            logger.error(f"Extract case data failed: {e}")
-            return None, None
+        return table_data
 
     def safe_wait(self, element_id, timeout=TIMEOUT_SHORT):
         """Safely wait for element by ID"""
@@ -109,108 +245,121 @@ class DataExtractor:
         Returns:
             bool: True if PDF created successfully
         """
+        with metrics.timed("pdf_render"):
+            return DataExtractor._create_pdf(civil_data, criminal_data, filename, court_name)
+
+    @staticmethod
+    def _create_pdf(civil_data, criminal_data, filename, court_name):
         try:
             doc = SimpleDocTemplate(str(filename), pagesize=landscape(A4), 
                                   leftMargin=0.5*inch, rightMargin=0.5*inch,
                                   topMargin=0.5*inch, bottomMargin=0.5*inch)
-            story = []
-            styles = getSampleStyleSheet()
+            doc.build(LazyStory(DataExtractor._story(civil_data, criminal_data, court_name)))
+            return True
 
-            title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
-                fontSize=18, textColor=colors.HexColor('#4866af'), spaceAfter=10,
-                alignment=TA_CENTER, fontName='Helvetica-Bold')
+        except Exception as e:
+            logger.error(f"PDF creation failed: {e}")
+            return False
 
-            court_style = ParagraphStyle('CourtStyle', parent=styles['Normal'],
-                fontSize=12, textColor=colors.HexColor('#4866af'), spaceAfter=5,
-                alignment=TA_CENTER, fontName='Helvetica-Bold')
+    @staticmethod
+    def _story(civil_data, criminal_data, court_name):
+        """Yield the PDF flowables; table rows are read page by page as the PDF is laid out"""
+        styles = getSampleStyleSheet()
 
-            judge_style = ParagraphStyle('JudgeStyle', parent=styles['Normal'],
-                fontSize=11, spaceAfter=5, alignment=TA_CENTER, fontName='Helvetica-Bold')
+        title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
+            fontSize=18, textColor=colors.HexColor('#4866af'), spaceAfter=10,
+            alignment=TA_CENTER, fontName='Helvetica-Bold')
 
-            date_style = ParagraphStyle('DateStyle', parent=styles['Normal'],
-                fontSize=10, spaceAfter=20, alignment=TA_CENTER)
+        court_style = ParagraphStyle('CourtStyle', parent=styles['Normal'],
+            fontSize=12, textColor=colors.HexColor('#4866af'), spaceAfter=5,
+            alignment=TA_CENTER, fontName='Helvetica-Bold')
 
-            cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=8, leading=10)
+        judge_style = ParagraphStyle('JudgeStyle', parent=styles['Normal'],
+            fontSize=11, spaceAfter=5, alignment=TA_CENTER, fontName='Helvetica-Bold')
 
-            no_cases_style = ParagraphStyle('NoCases', parent=styles['Normal'],
-                fontSize=12, textColor=colors.red, spaceAfter=20,
-                alignment=TA_CENTER, fontName='Helvetica-Bold')
+        date_style = ParagraphStyle('DateStyle', parent=styles['Normal'],
+            fontSize=10, spaceAfter=20, alignment=TA_CENTER)
 
-            story.append(Paragraph(f"eCourts Case List - {court_name}", title_style))
-            story.append(Spacer(1, 0.2*inch))
+        cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=8, leading=10)
 
-            for case_type, case_data in [("CIVIL CASES", civil_data), ("CRIMINAL CASES", criminal_data)]:
-                if case_type == "CRIMINAL CASES" and story:
-                    story.append(PageBreak())
+        no_cases_style = ParagraphStyle('NoCases', parent=styles['Normal'],
+            fontSize=12, textColor=colors.red, spaceAfter=20,
+            alignment=TA_CENTER, fontName='Helvetica-Bold')
 
-                story.append(Paragraph(case_type, title_style))
-                story.append(Spacer(1, 0.1*inch))
+        yield Paragraph(f"eCourts Case List - {court_name}", title_style)
+        yield Spacer(1, 0.2*inch)
 
-                if not case_data or not case_data[0]:
-                    story.append(Paragraph(f"No {case_type.lower()} found", no_cases_style))
-                    continue
+        for case_type, case_data in [("CIVIL CASES", civil_data), ("CRIMINAL CASES", criminal_data)]:
+            if case_type == "CRIMINAL CASES":
+                yield PageBreak()
 
-                heading, table_data = case_data
-
-                if heading.get('court_name'):
-                    story.append(Paragraph(heading['court_name'], court_style))
-                if heading.get('judge_info'):
-                    story.append(Paragraph(f"In the court of: {heading['judge_info']}", judge_style))
-                if heading.get('designation'):
-                    story.append(Paragraph(heading['designation'], judge_style))
-                if heading.get('case_type_date'):
-                    story.append(Paragraph(heading['case_type_date'], date_style))
-
-                story.append(Spacer(1, 0.1*inch))
-
-                if table_data and len(table_data) > 1:
-                    processed_data = []
-                    for row in table_data:
-                        if row['type'] == 'header':
-                            processed_data.append([Paragraph(f"<b>{row['text']}</b>", cell_style), '', '', ''])
-                        else:
-                            wrapped_row = [Paragraph(str(cell), cell_style) if cell else '' 
-                                         for cell in row['cells'][:4]]
-                            while len(wrapped_row) < 4:
-                                wrapped_row.append('')
-                            processed_data.append(wrapped_row)
-
-                    t = Table(processed_data, colWidths=[0.7*inch, 2.2*inch, 3.5*inch, 2.2*inch], repeatRows=1)
-
-                    table_style = [
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4866af')),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('TOPPADDING', (0, 0), (-1, -1), 8),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ]
-
-                    for idx, row in enumerate(table_data):
-                        if row['type'] == 'header':
-                            table_style.extend([
-                                ('SPAN', (0, idx), (-1, idx)),
-                                ('BACKGROUND', (0, idx), (-1, idx), colors.HexColor('#e6f2ff')),
-                                ('TEXTCOLOR', (0, idx), (-1, idx), colors.HexColor('#3880d4')),
-                                ('FONTNAME', (0, idx), (-1, idx), 'Helvetica-Bold'),
-                                ('ALIGN', (0, idx), (-1, idx), 'LEFT'),
-                                ('FONTSIZE', (0, idx), (-1, idx), 9),
-                            ])
-
-                    t.setStyle(TableStyle(table_style))
-                    story.append(t)
-                else:
-                    story.append(Paragraph(f"No {case_type.lower()} found", no_cases_style))
+            yield Paragraph(case_type, title_style)
+            yield Spacer(1, 0.1*inch)
 
-            doc.build(story)
-            return True
+            if not case_data or not case_data[0]:
+                yield Paragraph(f"No {case_type.lower()} found", no_cases_style)
+                continue
 
-        except Exception as e:
-            logger.error(f"PDF creation failed: {e}")
-            return False
+            heading, table_data = case_data
+
+            if heading.get('court_name'):
+                yield Paragraph(heading['court_name'], court_style)
+            if heading.get('judge_info'):
+                yield Paragraph(f"In the court of: {heading['judge_info']}", judge_style)
+            if heading.get('designation'):
+                yield Paragraph(heading['designation'], judge_style)
+            if heading.get('case_type_date'):
+                yield Paragraph(heading['case_type_date'], date_style)
+
+            yield Spacer(1, 0.1*inch)
+
+            if table_data and len(table_data) > 1:
+                rows = iter(table_data)
+                yield LazyTable(next(rows), rows, cell_style)
+            else:
+                yield Paragraph(f"No {case_type.lower()} found", no_cases_style)
+
+    @staticmethod
+    def _table(table_data, cell_style):
+        """Table of the given rows; its first row is the column header, repeated on every page"""
+        processed_data = []
+        for row in table_data:
+            if row['type'] == 'header':
+                processed_data.append([Paragraph(f"<b>{row['text']}</b>", cell_style), '', '', ''])
+            else:
+                wrapped_row = [Paragraph(str(cell), cell_style) if cell else '' 
+                             for cell in row['cells'][:4]]
+                while len(wrapped_row) < 4:
+                    wrapped_row.append('')
+                processed_data.append(wrapped_row)
+
+        t = Table(processed_data, colWidths=[0.7*inch, 2.2*inch, 3.5*inch, 2.2*inch], repeatRows=1)
+
+        table_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4866af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]
+
+        for idx, row in enumerate(table_data):
+            if row['type'] == 'header':
+                table_style.extend([
+                    ('SPAN', (0, idx), (-1, idx)),
+                    ('BACKGROUND', (0, idx), (-1, idx), colors.HexColor('#e6f2ff')),
+                    ('TEXTCOLOR', (0, idx), (-1, idx), colors.HexColor('#3880d4')),
+                    ('FONTNAME', (0, idx), (-1, idx), 'Helvetica-Bold'),
+                    ('ALIGN', (0, idx), (-1, idx), 'LEFT'),
+                    ('FONTSIZE', (0, idx), (-1, idx), 9),
+                ])
+
+        t.setStyle(TableStyle(table_style))
+        return t
 
 
 class CourtProcessor:
@@ -230,17 +379,22 @@ class CourtProcessor:
         Returns:
             Tuple: (civil_data, criminal_data)
         """
-        civil_data = None
-        criminal_data = None
-
         # Process Civil Cases
-        if captcha_handler.process_with_captcha('civ', max_retries):
-            civil_data = self.extractor.extract_case_data()
+        civil_data = self.process_case_type(captcha_handler, 'civ', max_retries)
 
         time.sleep(2)
 
         # Process Criminal Cases
-        if captcha_handler.process_with_captcha('cri', max_retries):
-            criminal_data = self.extractor.extract_case_data()
+        criminal_data = self.process_case_type(captcha_handler, 'cri', max_retries)
 
         return civil_data, criminal_data
+
+    def process_case_type(self, captcha_handler, case_type, max_retries=3):
+        """Process a single case type ('civ' or 'cri')
+
+        Returns:
+            Tuple: (heading_data, table_data), or None if the CAPTCHA could not be passed
+        """
+        if captcha_handler.process_with_captcha(case_type, max_retries):
+            return self.extractor.extract_case_data()
+        return None
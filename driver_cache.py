@@ -0,0 +1,202 @@
+"""
+eCourts Driver Cache Module
+Caches the patched chromedriver binary and clones a pre-warmed Chrome profile for faster launches
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import sqlite3
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+import undetected_chromedriver as uc
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path.home() / ".cache" / "ecourts_scraper"
+DRIVER_CACHE_DIR = CACHE_DIR / "driver"
+PROFILE_TEMPLATE_DIR = CACHE_DIR / "profile_template"
+PROFILE_CLONE_ROOT = Path(tempfile.gettempdir()) / "ecourts_profiles"
+PROFILE_MAX_AGE_HOURS = 24
+# Unused clones younger than this may belong to a browser that is still starting
+PROFILE_SWEEP_GRACE_SECONDS = 300
+# Lock files and per-run state that must never be shared between browsers
+PROFILE_SKIP = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile",
+                "Crashpad", "BrowserMetrics", "DevToolsActivePort")
+COOKIE_DBS = ("Default/Network/Cookies", "Default/Cookies")
+
+
+class DriverCache:
+    """Keeps one patched chromedriver per Chrome version and reuses it across launches"""
+
+    def __init__(self, cache_dir=DRIVER_CACHE_DIR, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.path = None
+        self.version_main = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def driver_path(self):
+        """Path of the cached patched chromedriver, or None to let undetected-chromedriver patch"""
+        if not self.enabled or self._failed:
+            return None
+        with self._lock:
+            if self.path and Path(self.path).exists():
+                return self.path
+            try:
+                self.path = self._prepare()
+            except Exception as e:
+                self._failed = True
+                logger.warning(f"chromedriver cache unavailable, patching on every launch: {e}")
+                return None
+            return self.path
+
+    def _prepare(self):
+        source = ChromeDriverManager().install()
+        match = re.search(r'(\d+)\.\d+\.\d+\.\d+', source)
+        version = match.group(0) if match else "unknown"
+        self.version_main = int(version.split('.')[0]) if match else None
+
+        suffix = ".exe" if sys.platform.startswith("win") else ""
+        target = self.cache_dir / f"undetected_chromedriver_{version}{suffix}"
+        if not target.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            staging = target.with_name(target.name + f".{os.getpid()}.tmp")
+            shutil.copy2(source, staging)
+            os.chmod(staging, 0o755)
+            uc.Patcher(executable_path=str(staging)).auto()
+            os.replace(staging, target)
+            logger.info(f"Cached patched chromedriver {version} at {target}")
+        return str(target)
+
+
+class ProfileTemplate:
+    """Pre-warmed user-data-dir that new browsers clone instead of starting empty"""
+
+    def __init__(self, template_dir=PROFILE_TEMPLATE_DIR, clone_root=PROFILE_CLONE_ROOT,
+                 max_age_hours=PROFILE_MAX_AGE_HOURS, enabled=True):
+        self.template_dir = Path(template_dir)
+        self.clone_root = Path(clone_root)
+        self.max_age = max_age_hours * 3600
+        self.enabled = enabled
+        self._lock = threading.RLock()
+
+    def ready(self):
+        """True if a fresh template exists"""
+        marker = self.template_dir / "Default"
+        return (self.enabled and marker.exists()
+                and time.time() - self.template_dir.stat().st_mtime < self.max_age)
+
+    def staging_dir(self):
+        """Empty directory for priming a new template"""
+        self.template_dir.parent.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix="profile_staging_", dir=self.template_dir.parent))
+
+    def commit(self, staging):
+        """Scrub session state from a primed profile and make it the template"""
+        staging = Path(staging)
+        self._remove_skipped(staging)
+        self._scrub_cookies(staging)
+        with self._lock:
+            old = None
+            if self.template_dir.exists():
+                old = self.template_dir.with_name(f"{self.template_dir.name}.old.{os.getpid()}")
+                os.replace(self.template_dir, old)
+            os.replace(staging, self.template_dir)
+            os.utime(self.template_dir)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+        return True
+
+    def clone(self):
+        """Copy-on-write clone of the template, or None if no template is ready"""
+        if not self.ready():
+            return None
+        self.clone_root.mkdir(parents=True, exist_ok=True)
+        target = Path(tempfile.mkdtemp(prefix="profile_", dir=self.clone_root))
+        try:
+            with self._lock:
+                _copy_tree(self.template_dir, target)
+            self._remove_skipped(target)
+            return str(target)
+        except Exception as e:
+            logger.warning(f"Profile clone failed, starting with empty profile: {e}")
+            shutil.rmtree(target, ignore_errors=True)
+            return None
+
+    def discard(self, path):
+        """Delete a cloned profile"""
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def sweep(self, in_use):
+        """Delete clones and staging profiles left by crashed or killed runs
+
+        Args:
+            in_use: user-data-dir paths of running browsers; these are never removed
+        """
+        in_use = {os.path.realpath(path) for path in in_use}
+        cutoff = time.time() - PROFILE_SWEEP_GRACE_SECONDS
+        candidates = list(self.clone_root.glob("profile_*")) if self.clone_root.exists() else []
+        if self.template_dir.parent.exists():
+            candidates += self.template_dir.parent.glob("profile_staging_*")
+        removed = 0
+        for path in candidates:
+            try:
+                if os.path.realpath(path) in in_use or path.stat().st_mtime > cutoff:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} stale browser profile(s)")
+        return removed
+
+    def _remove_skipped(self, root):
+        # os.walk instead of rglob: Chrome's Singleton* entries are dangling symlinks
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in set(dirnames + filenames) & set(PROFILE_SKIP):
+                path = Path(dirpath) / name
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path, ignore_errors=True)
+                    dirnames.remove(name)
+                else:
+                    path.unlink(missing_ok=True)
+
+    def _scrub_cookies(self, root):
+        # Clones must not share a server session, or their captchas overwrite each other
+        for relative in COOKIE_DBS:
+            db = Path(root) / relative
+            if not db.exists():
+                continue
+            try:
+                with sqlite3.connect(db) as conn:
+                    conn.execute("DELETE FROM cookies WHERE is_persistent = 0 OR upper(name) LIKE '%SESS%'")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not scrub cookies in {db}: {e}")
+
+
+def _copy_tree(src, dst):
+    """Copy a directory using filesystem clones where supported, else a plain copy"""
+    commands = []
+    if sys.platform.startswith("linux"):
+        commands.append(["cp", "-a", "--reflink=auto", f"{src}/.", str(dst)])
+    elif sys.platform == "darwin":
+        commands.append(["cp", "-c", "-R", f"{src}/.", str(dst)])
+    for command in commands:
+        if shutil.which(command[0]) and subprocess.run(command, capture_output=True).returncode == 0:
+            return
+    shutil.copytree(src, dst, dirs_exist_ok=True, symlinks=True, ignore=shutil.ignore_patterns(*PROFILE_SKIP))
+
+
+# Shared caches used by create_new_driver
+driver_cache = DriverCache()
+profile_template = ProfileTemplate()
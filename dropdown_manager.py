@@ -9,6 +9,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -154,37 +155,42 @@ class DropdownManager:
         """Complete navigation setup for court selection"""
         try:
             # Select state
-            Select(self.driver.find_element(By.ID, "sess_state_code")).select_by_value(state_code)
-            time.sleep(1)
+            with metrics.timed("nav_state"):
+                Select(self.driver.find_element(By.ID, "sess_state_code")).select_by_value(state_code)
+                time.sleep(1)
 
             # Wait and select district
-            WebDriverWait(self.driver, TIMEOUT_SHORT).until(
-                lambda d: len(Select(d.find_element(By.ID, "sess_dist_code")).options) > 1
-            )
-            Select(self.driver.find_element(By.ID, "sess_dist_code")).select_by_value(dist_code)
-            time.sleep(1)
+            with metrics.timed("nav_district"):
+                WebDriverWait(self.driver, TIMEOUT_SHORT).until(
+                    lambda d: len(Select(d.find_element(By.ID, "sess_dist_code")).options) > 1
+                )
+                Select(self.driver.find_element(By.ID, "sess_dist_code")).select_by_value(dist_code)
+                time.sleep(1)
 
             # Wait and select complex
-            WebDriverWait(self.driver, TIMEOUT_SHORT).until(
-                lambda d: len(Select(d.find_element(By.ID, "court_complex_code")).options) > 1
-            )
-            Select(self.driver.find_element(By.ID, "court_complex_code")).select_by_value(complex_code)
-            time.sleep(1)
+            with metrics.timed("nav_complex"):
+                WebDriverWait(self.driver, TIMEOUT_SHORT).until(
+                    lambda d: len(Select(d.find_element(By.ID, "court_complex_code")).options) > 1
+                )
+                Select(self.driver.find_element(By.ID, "court_complex_code")).select_by_value(complex_code)
+                time.sleep(1)
 
             # Wait and select court
-            WebDriverWait(self.driver, TIMEOUT_SHORT).until(
-                lambda d: len(Select(d.find_element(By.ID, "CL_court_no")).options) > 1
-            )
-            if not self.select_court(court_value):
-                return False
+            with metrics.timed("nav_court"):
+                WebDriverWait(self.driver, TIMEOUT_SHORT).until(
+                    lambda d: len(Select(d.find_element(By.ID, "CL_court_no")).options) > 1
+                )
+                if not self.select_court(court_value):
+                    return False
 
-            time.sleep(1)
+                time.sleep(1)
 
             # Set date
-            if not self.select_date(selected_date):
-                return False
+            with metrics.timed("nav_date"):
+                if not self.select_date(selected_date):
+                    return False
 
-            time.sleep(1)
+                time.sleep(1)
             return True
 
         except Exception as e:
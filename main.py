@@ -1,25 +1,30 @@
 import streamlit as st
-import undetected_chromedriver as uc
 import time
 import re
 import logging
 from datetime import date, timedelta
 from pathlib import Path
 import zipfile
-import concurrent.futures
+import contextlib
 from dropdown_manager import DropdownManager
 from captcha_handler import CaptchaHandler
 from data_extractor import DataExtractor, CourtProcessor
+from metrics import metrics
+from court_runner import (OUTPUT_DIR, ECOURTS_URL, create_new_driver, process_single_court,
+                          prime_profile_template, open_session_pair, run_court_split, run_courts)
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from ocr_service import ocr_client
+from tab_pool import TabPool
+from case_index import case_index, CASE_TYPES
+from spool import ResultSpool
 
 # ==================== CONFIG ====================
 st.set_page_config(page_title="eCourts Bulk Downloader", layout="wide", initial_sidebar_state="collapsed")
 logging.basicConfig(level=logging.WARNING)
 
-OUTPUT_DIR = Path("ecourts_pdfs")
 OUTPUT_DIR.mkdir(exist_ok=True)
 MAX_WORKERS = 3
-TIMEOUT_LONG = 15
-ECOURTS_URL = "https://services.ecourts.gov.in/ecourtindia_v6/?p=cause_list/"
 
 # ==================== STYLING ====================
 st.markdown("""
@@ -32,85 +37,19 @@ st.markdown("""
 st.markdown('<div class="main-title">⚖️ eCourts Cause List Downloader</div>', unsafe_allow_html=True)
 
 # ==================== DRIVER ====================
-def create_new_driver():
-    """Create Chrome driver instance using undetected-chromedriver"""
-    try:
-        options = uc.ChromeOptions()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--headless=new")  # Use new headless mode
-        driver = uc.Chrome(options=options, version_main=None)
-        driver.set_page_load_timeout(TIMEOUT_LONG)
-        driver.implicitly_wait(2)
-        return driver
-    except Exception as e:
-        st.error(f"Driver creation failed: {e}")
-        return None
-
 @st.cache_resource(show_spinner=False)
 def get_main_driver():
     """Initialize main driver (CACHED)"""
-    driver = create_new_driver()
+    supervisor.reap_orphans()
+    driver = create_new_driver(persistent=True)
     if driver:
-        driver.get(ECOURTS_URL)
+        with metrics.timed("page_load"):
+            driver.get(ECOURTS_URL)
         time.sleep(2)
+    else:
+        st.error("Driver creation failed")
     return driver
 
-# ==================== BULK PROCESSING ====================
-def process_single_court(court_info, selected_date, max_retries=3):
-    """Process single court with own driver - retry 3 times on failure"""
-    for attempt in range(1, max_retries + 1):
-        driver = None
-        try:
-            driver = create_new_driver()
-            if not driver:
-                if attempt == max_retries:
-                    return {'status': 'error', 'court': court_info['court_name'], 'error': 'Tried multiple times, unable to get. Try refreshing page and try again.'}
-                time.sleep(1)
-                continue
-
-            driver.get(ECOURTS_URL)
-            time.sleep(2)
-
-            dropdown_mgr = DropdownManager(driver)
-            captcha_handler = CaptchaHandler(driver)
-            court_processor = CourtProcessor(driver)
-
-            if not dropdown_mgr.setup_navigation(
-                court_info['state_code'], court_info['dist_code'],
-                court_info['complex_code'], court_info['court_value'], selected_date
-            ):
-                if attempt == max_retries:
-                    return {'status': 'error', 'court': court_info['court_name'], 'error': 'Tried multiple times, unable to get. Try refreshing page and try again.'}
-                time.sleep(1)
-                continue
-
-            civil_data, criminal_data = court_processor.process_cases(captcha_handler)
-            safe_filename = re.sub(r'[<>:"/\\|?*]', '_', court_info['court_name'])
-            pdf_path = OUTPUT_DIR / f"{safe_filename}_{selected_date.strftime('%Y%m%d')}.pdf"
-
-            if DataExtractor.create_pdf(civil_data, criminal_data, str(pdf_path), court_info['court_name']):
-                return {'status': 'success', 'court': court_info['court_name'], 'file': str(pdf_path)}
-            
-            if attempt == max_retries:
-                return {'status': 'error', 'court': court_info['court_name'], 'error': 'Tried multiple times, unable to get. Try refreshing page and try again.'}
-            time.sleep(1)
-            
-        except Exception as e:
-            if attempt == max_retries:
-                return {'status': 'error', 'court': court_info['court_name'], 'error': 'Tried multiple times, unable to get. Try refreshing page and try again.'}
-            time.sleep(1)
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-    
-    return {'status': 'error', 'court': court_info['court_name'], 'error': 'Tried multiple times, unable to get. Try refreshing page and try again.'}
-
 # ==================== INIT SESSION STATE ====================
 def init_session():
     """Initialize session state"""
@@ -218,7 +157,12 @@ selected_date = st.date_input("Select date", date.today(),
 st.session_state.selected_date = selected_date
 
 st.markdown('<div class="section-header">📥 Download Mode</div>', unsafe_allow_html=True)
-download_mode = st.radio("", ["📄 Single Court", "📚 All Courts (Bulk Download)"], horizontal=True, label_visibility="collapsed")
+download_mode = st.radio("", ["📄 Single Court", "📚 All Courts (Bulk Download)", "🔎 Search Cause Lists"],
+                         horizontal=True, label_visibility="collapsed")
+split_case_types = False
+if download_mode != "🔎 Search Cause Lists":
+    split_case_types = st.checkbox("⚡ Fetch civil and criminal lists in parallel", value=False,
+                                   help="Uses two isolated tabs per court, each solving its own captcha")
 
 st.markdown("---")
 
@@ -234,25 +178,40 @@ if download_mode == "📄 Single Court":
     st.info(f"📅 **Date:** {selected_date.strftime('%d-%m-%Y')} | ⚖️ **Court:** {selected_court}")
 
     if st.button("🚀 Download PDF", type="primary", use_container_width=True):
+        court_info = {
+            'state_code': st.session_state.states[st.session_state.current_state],
+            'dist_code': districts[st.session_state.current_district],
+            'complex_code': complexes[st.session_state.current_complex],
+            'complex_name': st.session_state.current_complex,
+            'court_value': courts[selected_court],
+            'court_name': selected_court
+        }
         with st.spinner("🔄 Processing..."):
+            pair = open_session_pair(driver) if split_case_types else None
             try:
-                captcha_handler = CaptchaHandler(driver)
-                court_processor = CourtProcessor(driver)
-
-                if not dropdown_manager.setup_navigation(
-                    st.session_state.states[st.session_state.current_state],
-                    districts[st.session_state.current_district],
-                    complexes[st.session_state.current_complex],
-                    courts[selected_court], selected_date
-                ):
-                    st.error("❌ Navigation failed")
-                    st.stop()
-
-                civil_data, criminal_data = court_processor.process_cases(captcha_handler)
-                safe_filename = re.sub(r'[<>:"/\\|?*]', '_', selected_court)
-                pdf_filename = f"{safe_filename}_{selected_date.strftime('%Y%m%d')}.pdf"
-
-                if DataExtractor.create_pdf(civil_data, criminal_data, pdf_filename, selected_court):
+                if pair:
+                    result = run_court_split([tab.driver for tab in pair.tabs], court_info, selected_date,
+                                             ECOURTS_URL, output_dir=".")
+                    pdf_filename = Path(result['file']).name if result else None
+                else:
+                    captcha_handler = CaptchaHandler(driver)
+                    court_processor = CourtProcessor(driver)
+
+                    if not dropdown_manager.setup_navigation(
+                        court_info['state_code'], court_info['dist_code'], court_info['complex_code'],
+                        court_info['court_value'], selected_date
+                    ):
+                        st.error("❌ Navigation failed")
+                        st.stop()
+
+                    civil_data, criminal_data = court_processor.process_cases(captcha_handler)
+                    case_index.ingest_court(court_info, selected_date, civil_data, criminal_data)
+                    safe_filename = re.sub(r'[<>:"/\\|?*]', '_', selected_court)
+                    pdf_filename = f"{safe_filename}_{selected_date.strftime('%Y%m%d')}.pdf"
+                    if not DataExtractor.create_pdf(civil_data, criminal_data, pdf_filename, selected_court):
+                        pdf_filename = None
+
+                if pdf_filename:
                     st.success("✅ PDF generated successfully!")
                     with open(pdf_filename, "rb") as f:
                         st.download_button("📥 Download PDF", f.read(), pdf_filename, 
@@ -261,11 +220,52 @@ if download_mode == "📄 Single Court":
                     st.error("❌ PDF generation failed")
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
+            finally:
+                if pair:
+                    pair.close()
+
+# ==================== SEARCH MODE ====================
+elif download_mode == "🔎 Search Cause Lists":
+    index_stats = case_index.stats()
+    st.info(f"🗂️ **Indexed:** {index_stats['rows']} listings | ⚖️ {index_stats['courts']} courts | "
+            f"📅 {index_stats['dates']} dates")
+
+    scol1, scol2 = st.columns([3, 1])
+    query = scol1.text_input("Advocate, party or case number", placeholder="e.g. Prakash")
+    search_in = scol2.selectbox("Search in", ["Advocate", "Party", "Case number", "Anywhere"])
+
+    fcol1, fcol2, fcol3 = st.columns(3)
+    only_selected_date = fcol1.checkbox(f"Only {selected_date.strftime('%d-%m-%Y')}", value=True)
+    indexed_complexes = case_index.complexes()
+    selected_complexes = fcol2.multiselect("Court complexes", list(indexed_complexes.keys()))
+    case_type_label = fcol3.selectbox("Case type", ["All", "Civil", "Criminal"])
+
+    if query:
+        column = {"Advocate": "advocate", "Party": "parties", "Case number": "case_no"}.get(search_in)
+        case_type = {label: code for code, label in CASE_TYPES.items()}.get(case_type_label)
+        matches = case_index.search(query, column,
+                                    selected_date if only_selected_date else None,
+                                    [indexed_complexes[name] for name in selected_complexes] or None,
+                                    case_type)
+        if matches:
+            st.success(f"✅ {len(matches)} matter(s) found")
+            st.dataframe([{
+                'Date': m['list_date'], 'Type': CASE_TYPES.get(m['case_type'], m['case_type']),
+                'Complex': m['complex_name'], 'Court': m['court_name'], 'Stage': m['stage'],
+                'Sr No': m['serial'], 'Case': m['case_no'], 'Parties': m['parties'], 'Advocate': m['advocate']
+            } for m in matches], use_container_width=True, hide_index=True)
+            export_name = f"ecourts_search_{re.sub(r'[^A-Za-z0-9]+', '_', query)}.csv"
+            st.download_button("📥 Export CSV", case_index.to_csv(matches), export_name, "text/csv",
+                               use_container_width=True)
+        else:
+            st.warning("No matching listings in the index. Download cause lists first to add them.")
 
 # ==================== BULK MODE ====================
 else:
     st.info(f"📊 **Total Courts:** {len(courts)} | 📅 **Date:** {selected_date.strftime('%d-%m-%Y')}")
     clear_old = st.checkbox("🗑️ Clear old PDF files", value=True)
+    tabs_per_browser = st.slider("🗂️ Tabs per browser", 1, 6, 1,
+                                 help="Run several isolated sessions as tabs of one browser to save memory")
 
     if st.button("🚀 Download All Courts", type="primary", use_container_width=True):
         if clear_old:
@@ -273,11 +273,14 @@ else:
                 f.unlink(missing_ok=True)
             for f in OUTPUT_DIR.glob("*.zip"):
                 f.unlink(missing_ok=True)
+            for f in OUTPUT_DIR.glob("results_*.ndjson"):
+                f.unlink(missing_ok=True)
 
         court_info_list = [{
             'state_code': st.session_state.states[st.session_state.current_state],
             'dist_code': districts[st.session_state.current_district],
             'complex_code': complexes[st.session_state.current_complex],
+            'complex_name': st.session_state.current_complex,
             'court_value': court_value,
             'court_name': court_name
         } for court_name, court_value in courts.items()]
@@ -287,44 +290,72 @@ else:
         status_text = st.empty()
         current_court_text = st.empty()
 
-        results, completed, successful_files = [], 0, []
+        metrics.reset()
+        resource_blocker.reset()
         status_text.markdown(f"**Progress: 0/{total_courts}** (0.0%)")
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {executor.submit(process_single_court, info, selected_date): info['court_name'] 
-                      for info in court_info_list}
-
-            for future in concurrent.futures.as_completed(futures):
-                court_name = futures[future]
+        prime_profile_template()
+        ocr_client.start()
+        workers = supervisor.max_workers(MAX_WORKERS)
+        if workers < MAX_WORKERS:
+            st.warning(f"⚠️ Low memory: running {workers} parallel browser(s) instead of {MAX_WORKERS}")
+
+        # Every browser, the spool and the ZIP are released even if the run stops early
+        # (Streamlit stop or rerun, or an error in the loop)
+        with contextlib.ExitStack() as cleanup:
+            job = supervisor.start_job()
+            cleanup.callback(supervisor.finish_job, job)
+            process_court = lambda info, day: process_single_court(info, day, split_case_types=split_case_types,
+                                                                   job=job)
+            if tabs_per_browser > 1:
                 try:
-                    result = future.result(timeout=180)
-                    results.append(result)
-                    completed += 1
+                    pool = TabPool(browsers=workers, tabs_per_browser=tabs_per_browser,
+                                   split_case_types=split_case_types, job=job).start()
+                except RuntimeError as e:
+                    st.error(f"❌ {e}")
+                    st.stop()
+                cleanup.callback(pool.close)
+                workers, process_court = pool.size, pool.process_court
 
+            # Results are spilled to NDJSON and PDFs are zipped as they finish, so memory stays flat
+            run_name = f"{st.session_state.current_complex.replace(' ', '_')}_{selected_date.strftime('%Y%m%d')}"
+            zip_filename = f"ecourts_{run_name}.zip"
+            zip_path = OUTPUT_DIR / zip_filename
+            OUTPUT_DIR.mkdir(exist_ok=True)
+            results = ResultSpool(OUTPUT_DIR / f"results_{run_name}.ndjson")
+            cleanup.callback(results.close)
+            zipf = cleanup.enter_context(zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED))
+            # Closing the generator cancels queued courts and waits for running ones
+            finished = cleanup.enter_context(contextlib.closing(
+                run_courts(process_court, court_info_list, selected_date, workers)))
+
+            for info, future in finished:
+                court_name = info['court_name']
+                try:
+                    result = future.result()
+                    # Zip before recording, so a court whose PDF cannot be zipped is counted once, as failed
                     if result['status'] == 'success':
-                        successful_files.append(result['file'])
-                        current_court_text.success(f"✅ {court_name}")
-                    else:
-                        current_court_text.error(f"❌ {court_name}: {result.get('error', 'Unknown')}")
-
-                    progress = completed / total_courts
-                    progress_bar.progress(progress)
-                    status_text.markdown(f"**Progress: {completed}/{total_courts}** ({progress*100:.1f}%)")
-                except concurrent.futures.TimeoutError:
-                    results.append({'status': 'error', 'court': court_name, 'error': 'Timeout'})
-                    completed += 1
-                    current_court_text.error(f"❌ Timeout: {court_name}")
+                        with metrics.timed("zip"):
+                            zipf.write(result['file'], Path(result['file']).name)
                 except Exception as e:
-                    results.append({'status': 'error', 'court': court_name, 'error': str(e)})
-                    completed += 1
+                    result = {'status': 'error', 'court': court_name, 'error': str(e)}
+                results.append(result)
+
+                if result['status'] == 'success':
+                    current_court_text.success(f"✅ {court_name}")
+                else:
+                    current_court_text.error(f"❌ {court_name}: {result.get('error', 'Unknown')}")
 
+                progress = results.total / total_courts
+                progress_bar.progress(progress)
+                status_text.markdown(f"**Progress: {results.total}/{total_courts}** ({progress*100:.1f}%)")
                 time.sleep(0.5)
 
         # Summary
         st.markdown("---")
         st.markdown('<div class="section-header">📈 Summary</div>', unsafe_allow_html=True)
 
-        success_count = sum(1 for r in results if r['status'] == 'success')
+        success_count = results.success
         failed_count = total_courts - success_count
 
         col1, col2, col3 = st.columns(3)
@@ -335,26 +366,56 @@ else:
         if success_count > 0:
             st.success(f"🎉 Generated {success_count} PDF(s)")
 
-            zip_filename = f"ecourts_{st.session_state.current_complex.replace(' ', '_')}_{selected_date.strftime('%Y%m%d')}.zip"
-            zip_path = OUTPUT_DIR / zip_filename
-
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for pdf in successful_files:
-                    zipf.write(pdf, Path(pdf).name)
-
+            # download_button reads the whole ZIP into memory; only building it is incremental
             with open(zip_path, "rb") as f:
-                st.download_button(f"📥 Download All {success_count} PDFs (ZIP)", f.read(), 
+                st.download_button(f"📥 Download All {success_count} PDFs (ZIP)", f, 
                                  zip_filename, "application/zip", use_container_width=True, type="primary")
 
             with st.expander(f"📄 Files ({success_count})"):
-                for pdf in successful_files:
-                    st.text(f"✅ {Path(pdf).name}")
+                for r in results.iter('success'):
+                    st.text(f"✅ {Path(r['file']).name}")
+        else:
+            zip_path.unlink(missing_ok=True)
 
         if failed_count > 0:
             with st.expander(f"⚠️ Failed ({failed_count})"):
-                for r in results:
-                    if r['status'] != 'success':
-                        st.text(f"❌ {r['court']}: {r.get('error', 'Unknown')}")
+                for r in results.failures():
+                    st.text(f"❌ {r['court']}: {r.get('error', 'Unknown')}")
+
+        # Timing
+        snapshot = metrics.snapshot()
+        court_stats = snapshot['court_duration']
+        tcol1, tcol2, tcol3 = st.columns(3)
+        tcol1.metric("⏱️ Total time", f"{snapshot['elapsed_seconds']:.1f}s")
+        tcol2.metric("p50 per court", f"{court_stats['p50']:.1f}s")
+        tcol3.metric("p95 per court", f"{court_stats['p95']:.1f}s")
+
+        blocked = resource_blocker.report()
+        if blocked['requests_blocked']:
+            saved = f", ~{blocked['bytes_saved'] / 1024 / 1024:.1f} MB saved" if blocked['bytes_saved'] else ""
+            st.caption(f"🚫 {blocked['requests_blocked']} non-essential requests blocked{saved} | "
+                       f"📶 {blocked['bytes_loaded'] / 1024 / 1024:.1f} MB downloaded in {blocked['requests_loaded']} requests")
+
+        ocr_stats = ocr_client.stats() if ocr_client.enabled else None
+        if ocr_stats:
+            st.caption(f"🔤 OCR service ({ocr_stats['engine']}): {ocr_stats['requests']} captchas since start, "
+                       f"mean batch {ocr_stats['batch_size']['mean']:.1f}, "
+                       f"p95 latency {ocr_stats['latency_seconds']['p95']:.2f}s, "
+                       f"queue depth {ocr_stats['queue_depth']}")
+
+        with st.expander("⏱️ Timing breakdown"):
+            st.table(metrics.phase_table())
+            st.json({'counters': snapshot['counters'], 'court_status': snapshot['court_status']}, expanded=False)
+            st.caption(f"Per-court seconds, attempts and rows: `{results.path}`")
+
+        metrics_json, metrics_prom = metrics.to_json(), metrics.to_prometheus()
+        (OUTPUT_DIR / "metrics.json").write_text(metrics_json, encoding="utf-8")
+        (OUTPUT_DIR / "metrics.prom").write_text(metrics_prom, encoding="utf-8")
+        mcol1, mcol2 = st.columns(2)
+        mcol1.download_button("📊 Metrics (JSON)", metrics_json, "metrics.json", "application/json",
+                              use_container_width=True)
+        mcol2.download_button("📊 Metrics (Prometheus)", metrics_prom, "metrics.prom", "text/plain",
+                              use_container_width=True)
 
 st.markdown("---")
-st.caption("💡 Each court uses independent browser | ⚙️ 3 parallel threads | 📁 Saved to 'ecourts_pdfs'")
\ No newline at end of file
+st.caption("💡 Each court uses independent browser or isolated tab | ⚙️ 3 parallel browsers | 📁 Saved to 'ecourts_pdfs'")
\ No newline at end of file
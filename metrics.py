@@ -0,0 +1,202 @@
+"""
+eCourts Metrics Module
+Collects per-phase timings and per-court aggregates, exported as JSON or Prometheus text
+
+Only aggregates are kept, so memory does not grow with the number of courts; per-court
+records go to the run's results spool (spool.ResultSpool).
+"""
+
+import json
+import time
+import threading
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Cumulative bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Add a single observation"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate quantile by linear interpolation inside the matching bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for idx, bucket_count in enumerate(self.counts):
+            upper = self.buckets[idx] if idx < len(self.buckets) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+    def to_dict(self):
+        """Summary used by the JSON export and the UI"""
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'mean': round(self.sum / self.count, 4) if self.count else 0.0,
+            'min': round(self.min, 4) if self.min is not None else 0.0,
+            'max': round(self.max, 4) if self.max is not None else 0.0,
+            'p50': round(self.quantile(0.5), 4),
+            'p95': round(self.quantile(0.95), 4),
+            'buckets': {str(b): c for b, c in zip(list(self.buckets) + ['+Inf'], self._cumulative())},
+        }
+
+    def _cumulative(self):
+        total, result = 0, []
+        for c in self.counts:
+            total += c
+            result.append(total)
+        return result
+
+
+class MetricsCollector:
+    """Thread-safe store for phase timings, event counters and per-court histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop everything collected so far"""
+        with self._lock:
+            self.phases = {}
+            self.counters = {}
+            self.court_status = {}
+            self.court_duration = Histogram(DURATION_BUCKETS)
+            self.court_attempts = Histogram(COUNT_BUCKETS)
+            self.court_rows = Histogram(COUNT_BUCKETS)
+            self.started_at = time.time()
+
+    def observe(self, phase, seconds):
+        """Record duration of one phase execution"""
+        with self._lock:
+            if phase not in self.phases:
+                self.phases[phase] = Histogram(DURATION_BUCKETS)
+            self.phases[phase].observe(seconds)
+
+    @contextmanager
+    def timed(self, phase):
+        """Context manager timing the wrapped block (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def increment(self, name, value=1):
+        """Increase an event counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_court(self, status, seconds, attempts, rows):
+        """Add the final outcome of one court to the aggregates"""
+        with self._lock:
+            self.court_status[status] = self.court_status.get(status, 0) + 1
+            self.court_duration.observe(seconds)
+            self.court_attempts.observe(attempts)
+            self.court_rows.observe(rows)
+
+    def snapshot(self):
+        """Return a plain dict copy of all metrics"""
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'elapsed_seconds': round(time.time() - self.started_at, 3),
+                'phases': {name: h.to_dict() for name, h in sorted(self.phases.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'court_duration': self.court_duration.to_dict(),
+                'court_attempts': self.court_attempts.to_dict(),
+                'court_rows': self.court_rows.to_dict(),
+                'court_status': dict(sorted(self.court_status.items())),
+            }
+
+    def phase_table(self):
+        """Rows for displaying phase histograms as a table"""
+        rows = []
+        for phase, data in self.snapshot()['phases'].items():
+            rows.append({'phase': phase, 'count': data['count'], 'mean (s)': data['mean'],
+                         'p50 (s)': data['p50'], 'p95 (s)': data['p95'],
+                         'max (s)': data['max'], 'total (s)': data['sum']})
+        return rows
+
+    def to_json(self, indent=2):
+        """Export metrics as JSON text"""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix="ecourts"):
+        """Export metrics in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            name = f"{prefix}_phase_duration_seconds"
+            lines += [f"# HELP {name} Duration of scraping phases", f"# TYPE {name} histogram"]
+            for phase, hist in sorted(self.phases.items()):
+                lines += _histogram_lines(name, hist, {'phase': phase})
+
+            for metric, hist, help_text in [
+                ('court_duration_seconds', self.court_duration, 'Wall time per court'),
+                ('court_attempts', self.court_attempts, 'Attempts needed per court'),
+                ('court_rows', self.court_rows, 'Extracted rows per court'),
+            ]:
+                name = f"{prefix}_{metric}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                lines += _histogram_lines(name, hist, {})
+
+            name = f"{prefix}_events_total"
+            lines += [f"# HELP {name} Event counters", f"# TYPE {name} counter"]
+            for event, value in sorted(self.counters.items()):
+                lines.append(f"{name}{_labels({'event': event})} {value}")
+
+            name = f"{prefix}_courts_total"
+            lines += [f"# HELP {name} Courts processed by final status", f"# TYPE {name} counter"]
+            for status, value in sorted(self.court_status.items()):
+                lines.append(f"{name}{_labels({'status': status})} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _histogram_lines(name, hist, labels):
+    lines = []
+    for bucket, total in zip(list(hist.buckets) + ['+Inf'], hist._cumulative()):
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bucket})} {total}")
+    lines.append(f"{name}_sum{_labels(labels)} {hist.sum}")
+    lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+    return lines
+
+
+# Shared collector used by all modules
+metrics = MetricsCollector()
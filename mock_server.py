@@ -0,0 +1,395 @@
+"""
+eCourts Mock Server
+Local stand-in for the eCourts cause list page, used for reproducible benchmarks
+
+Serves the same element IDs as the live site (sess_state_code, sess_dist_code,
+court_complex_code, CL_court_no, causelist_date, captcha_image, dispTable) and a
+submit_causelist() handler, with generated captchas, latency and error injection.
+
+Usage:
+    python mock_server.py --port 8765 --rows 500 --latency 0.2 --error-rate 0.05
+"""
+
+import io
+import json
+import time
+import random
+import secrets
+import logging
+import argparse
+import threading
+from html import escape
+from http.cookies import SimpleCookie
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+CAPTCHA_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+SESSION_COOKIE = "MOCKSESSID"
+STAGES = ["Evidence", "Hearing", "Arguments", "Judgement", "Appearance", "Orders"]
+PARTIES = ["Ramesh", "Suresh", "Lakshmi", "Anitha", "Venkatesh", "Fathima", "Joseph", "Manjunath",
+           "State of Karnataka", "Union Bank", "Gowramma", "Abdul Rahman"]
+ADVOCATES = ["K.S. Prakash", "M. Nagaraj", "S. Rekha", "B.R. Shetty", "P. Dsouza", "A. Kumar",
+             "H. Bhat", "V. Rao"]
+CIVIL_TYPES = ["O.S.", "M.A.", "R.A.", "Ex.P.", "M.C."]
+CRIMINAL_TYPES = ["C.C.", "S.C.", "Crl.Misc.", "P.C.R."]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>eCourts Services (mock)</title>
+<link rel="stylesheet" href="/static/style.css">
+<link rel="preload" href="/static/font.woff2" as="font" type="font/woff2" crossorigin>
+<script src="/static/vendor.js"></script>
+</head>
+<body>
+<img src="/static/logo.png" alt="logo">
+<img src="/static/banner.png" alt="banner">
+<div id="validateError" class="modal" style="display:none"><div class="modal-body"></div></div>
+<form id="frm">
+<select id="sess_state_code" onchange="loadOptions('districts', this.value, 'sess_dist_code')">
+<option value="0">Select State</option>{states}
+</select>
+<select id="sess_dist_code" onchange="loadOptions('complexes', this.value, 'court_complex_code')">
+<option value="0">Select District</option>
+</select>
+<select id="court_complex_code" onchange="loadOptions('courts', this.value, 'CL_court_no')">
+<option value="0">Select Court Complex</option>
+</select>
+<select id="CL_court_no"><option value="">Select Court</option></select>
+<input type="text" id="causelist_date" value="">
+<img id="captcha_image" src="/captcha?t={nonce}">
+<input type="text" id="cause_list_captcha_code" value="">
+</form>
+<div id="msg"></div>
+<div id="res_cause_list"></div>
+<script>
+function loadOptions(kind, value, target) {{
+    var select = document.getElementById(target);
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/ajax/' + kind + '?code=' + encodeURIComponent(value));
+    xhr.onload = function() {{
+        if (xhr.status !== 200) return;
+        var items = JSON.parse(xhr.responseText);
+        select.length = 1;
+        items.forEach(function(item) {{
+            var opt = document.createElement('option');
+            opt.value = item.value;
+            opt.text = item.text;
+            if (item.disabled) opt.disabled = true;
+            select.add(opt);
+        }});
+    }};
+    xhr.send();
+}}
+function refreshCaptcha() {{
+    document.getElementById('captcha_image').src = '/captcha?t=' + Date.now();
+    document.getElementById('cause_list_captcha_code').value = '';
+}}
+function submit_causelist(caseType) {{
+    var params = new URLSearchParams();
+    params.append('court_no', document.getElementById('CL_court_no').value);
+    params.append('complex', document.getElementById('court_complex_code').value);
+    params.append('date', document.getElementById('causelist_date').value);
+    params.append('captcha', document.getElementById('cause_list_captcha_code').value);
+    params.append('cicri', caseType);
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', '/ajax/submit_causelist');
+    xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+    xhr.onload = function() {{
+        var msg = document.getElementById('msg');
+        var res = document.getElementById('res_cause_list');
+        if (xhr.status !== 200) {{
+            msg.innerHTML = '<div class="alert alert-danger-cust">Server error</div>';
+        }} else {{
+            var data = JSON.parse(xhr.responseText);
+            if (data.status === 'invalid_captcha') {{
+                msg.innerHTML = '<div class="alert alert-danger-cust">Invalid Captcha</div>';
+            }} else {{
+                msg.innerHTML = '';
+                res.innerHTML = data.html;
+            }}
+        }}
+        refreshCaptcha();
+    }};
+    xhr.send(params.toString());
+}}
+</script>
+</body>
+</html>
+"""
+
+
+class MockDataset:
+    """Synthetic states, districts, complexes, courts and cause lists"""
+
+    def __init__(self, states=2, districts=2, complexes=2, courts=5, rows=50, seed=7):
+        self.rows = rows
+        self.seed = seed
+        self.states = {str(s): f"Mock State {s}" for s in range(1, states + 1)}
+        self.districts, self.complexes, self.courts = {}, {}, {}
+        for s in self.states:
+            self.districts[s] = {f"{s}-{d}": f"District {s}.{d}" for d in range(1, districts + 1)}
+            for d in self.districts[s]:
+                self.complexes[d] = {f"{d}-{c}": f"Court Complex {d}.{c}" for c in range(1, complexes + 1)}
+                for c in self.complexes[d]:
+                    self.courts[c] = {f"{c}^{n}": f"{n}-Mock Judge {c}.{n}-Civil Judge"
+                                      for n in range(1, courts + 1)}
+
+    def court_infos(self, complex_code=None):
+        """Return court_info dicts as used by court_runner.process_single_court"""
+        infos = []
+        for state_code, districts in self.districts.items():
+            for dist_code, complexes in ((d, self.complexes[d]) for d in districts):
+                for code in complexes:
+                    if complex_code and code != complex_code:
+                        continue
+                    for court_value, court_name in self.courts[code].items():
+                        infos.append({'state_code': state_code, 'dist_code': dist_code,
+                                      'complex_code': code, 'court_value': court_value,
+                                      'court_name': court_name})
+        return infos
+
+    def cause_list_rows(self, court_value, date_str, case_type):
+        """Deterministic rows for a court, date and case type"""
+        rng = random.Random(f"{self.seed}|{court_value}|{date_str}|{case_type}")
+        types = CIVIL_TYPES if case_type == 'civ' else CRIMINAL_TYPES
+        rows, serial = [], 1
+        stages = rng.sample(STAGES, k=min(3, len(STAGES)))
+        per_stage = max(1, self.rows // len(stages))
+        for stage in stages:
+            rows.append(('header', stage))
+            for _ in range(per_stage):
+                case_no = f"{rng.choice(types)}/{rng.randint(1, 2500)}/{rng.randint(2015, 2025)}"
+                parties = f"{rng.choice(PARTIES)} Vs {rng.choice(PARTIES)}"
+                advocate = rng.choice(ADVOCATES)
+                rows.append(('data', [str(serial), case_no, parties, advocate]))
+                serial += 1
+        return rows
+
+    def cause_list_html(self, court_value, date_str, case_type):
+        """Render result fragment in the same shape as the live site"""
+        court_name = next((name for courts in self.courts.values()
+                           for value, name in courts.items() if value == court_value), "Unknown Court")
+        label = "Civil" if case_type == 'civ' else "Criminal"
+        parts = [
+            "<center>",
+            "<span>District and Sessions Courts, Mock District</span><br>",
+            f"<span>In the court of : {escape(court_name)}</span><br>",
+            "<span>PRINCIPAL JUNIOR CIVIL JUDGE</span><br>",
+            f"<b>{label} Cases Listed on {escape(date_str)}</b>",
+            "</center>",
+            '<table id="dispTable"><thead><tr><th>Sr No</th><th>Cases</th>'
+            '<th>Party Name</th><th>Advocate</th></tr></thead><tbody>',
+        ]
+        for kind, value in self.cause_list_rows(court_value, date_str, case_type):
+            if kind == 'header':
+                parts.append(f'<tr><td colspan="4">{escape(value)}</td></tr>')
+            else:
+                parts.append("<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in value) + "</tr>")
+        parts.append("</tbody></table>")
+        return "".join(parts)
+
+
+def render_captcha(text):
+    """Render captcha text as a large, OCR-friendly PNG"""
+    font = ImageFont.load_default()
+    small = Image.new("L", (8 * len(text) + 8, 16), 255)
+    ImageDraw.Draw(small).text((4, 2), text, fill=0, font=font)
+    image = small.resize((small.width * 5, small.height * 5), Image.NEAREST)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class MockECourtsServer:
+    """Threaded HTTP server imitating the eCourts cause list flow"""
+
+    def __init__(self, host="127.0.0.1", port=0, dataset=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, accept_any_captcha=False, asset_kb=200):
+        self.dataset = dataset or MockDataset()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.accept_any_captcha = accept_any_captcha
+        self.asset_bytes = asset_kb * 1024
+        self.sessions = {}
+        self.stats = {'requests': 0, 'errors_injected': 0, 'submits': 0, 'invalid_captcha': 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def essential_urls(self):
+        """Captcha and script URLs the resource blocker must never block on this server"""
+        return [f"{self.url}captcha?t=1234", f"{self.url}static/vendor.js"]
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _should_fail(self):
+        with self._lock:
+            self.stats['requests'] += 1
+            fail = self.error_rate and self._rng.random() < self.error_rate
+            if fail:
+                self.stats['errors_injected'] += 1
+            return fail
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._rng.uniform(0, self.jitter))
+
+    def _new_captcha(self, session_id):
+        text = "".join(secrets.choice(CAPTCHA_ALPHABET) for _ in range(5))
+        with self._lock:
+            self.sessions[session_id] = text
+        return text
+
+    def _check_captcha(self, session_id, answer):
+        with self._lock:
+            expected = self.sessions.pop(session_id, None)
+        if self.accept_any_captcha:
+            return bool(answer)
+        return expected is not None and answer.strip().upper() == expected
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                logger.debug(fmt, *args)
+
+            def _session(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                if SESSION_COOKIE in cookie:
+                    return cookie[SESSION_COOKIE].value, False
+                return secrets.token_hex(8), True
+
+            def _send(self, body, content_type, status=200, session=None, cache=False):
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'public, max-age=86400' if cache else 'no-store')
+                if session:
+                    self.send_header('Set-Cookie', f"{SESSION_COOKIE}={session}; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server._delay()
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                session_id, is_new = self._session()
+                new_cookie = session_id if is_new else None
+
+                if parsed.path.startswith('/static/'):
+                    return self._static(parsed.path)
+                if server._should_fail():
+                    return self._send("Service Unavailable", "text/plain", 503)
+
+                if parsed.path == '/':
+                    states = "".join(f'<option value="{code}">{escape(name)}</option>'
+                                     for code, name in server.dataset.states.items())
+                    page = PAGE_TEMPLATE.format(states=states, nonce=secrets.token_hex(4))
+                    return self._send(page, "text/html; charset=utf-8", session=new_cookie)
+                if parsed.path == '/captcha':
+                    png = render_captcha(server._new_captcha(session_id))
+                    return self._send(png, "image/png", session=new_cookie)
+                if parsed.path.startswith('/ajax/'):
+                    code = query.get('code', [''])[0]
+                    kind = parsed.path.rsplit('/', 1)[-1]
+                    source = {'districts': server.dataset.districts, 'complexes': server.dataset.complexes,
+                              'courts': server.dataset.courts}.get(kind)
+                    if source is None:
+                        return self._send("Not Found", "text/plain", 404)
+                    items = [{'value': value, 'text': text} for value, text in source.get(code, {}).items()]
+                    if kind == 'courts' and items:
+                        items.insert(0, {'value': 'D', 'text': '--- Civil Courts ---', 'disabled': True})
+                    return self._send(json.dumps(items), "application/json")
+                return self._send("Not Found", "text/plain", 404)
+
+            def do_POST(self):
+                server._delay()
+                length = int(self.headers.get('Content-Length', 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+                session_id, _ = self._session()
+                if server._should_fail():
+                    return self._send("Service Unavailable", "text/plain", 503)
+                if urlparse(self.path).path != '/ajax/submit_causelist':
+                    return self._send("Not Found", "text/plain", 404)
+
+                with server._lock:
+                    server.stats['submits'] += 1
+                if not server._check_captcha(session_id, form.get('captcha', '')):
+                    with server._lock:
+                        server.stats['invalid_captcha'] += 1
+                    return self._send(json.dumps({'status': 'invalid_captcha'}), "application/json")
+                html = server.dataset.cause_list_html(form.get('court_no', ''), form.get('date', ''),
+                                                      form.get('cicri', 'civ'))
+                return self._send(json.dumps({'status': 'ok', 'html': html}), "application/json")
+
+            def _static(self, path):
+                # Filler assets so page loads carry realistic weight
+                types = {'.css': "text/css", '.js': "application/javascript", '.png': "image/png",
+                         '.woff2': "font/woff2"}
+                ext = path[path.rfind('.'):]
+                if ext not in types:
+                    return self._send("Not Found", "text/plain", 404)
+                if ext == '.css':
+                    body = "body{font-family:sans-serif}\n/*" + "x" * server.asset_bytes + "*/"
+                elif ext == '.js':
+                    body = "var vendor=1;\n//" + "x" * server.asset_bytes
+                else:
+                    body = bytes(server.asset_bytes)
+                return self._send(body, types[ext], cache=True)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock eCourts cause list server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--states", type=int, default=2)
+    parser.add_argument("--districts", type=int, default=2)
+    parser.add_argument("--complexes", type=int, default=2)
+    parser.add_argument("--courts", type=int, default=5, help="Courts per complex")
+    parser.add_argument("--rows", type=int, default=50, help="Approximate rows per cause list")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--accept-any-captcha", action="store_true")
+    parser.add_argument("--asset-kb", type=int, default=200, help="Size of each filler static asset")
+    args = parser.parse_args()
+
+    dataset = MockDataset(args.states, args.districts, args.complexes, args.courts, args.rows)
+    server = MockECourtsServer(args.host, args.port, dataset, args.latency, args.jitter,
+                               args.error_rate, args.accept_any_captcha, args.asset_kb)
+    print(f"Mock eCourts server on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
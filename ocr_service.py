@@ -0,0 +1,414 @@
+"""
+eCourts OCR Service
+Shared captcha OCR process that loads the engine once and batches requests from all workers
+
+Workers send PNG bytes over a local authenticated socket (multiprocessing.connection).
+Requests arriving within BATCH_WINDOW are recognised together: with tesserocr the
+engine stays loaded in-process, otherwise the batch is stacked into one image so a
+single tesseract call serves every waiting worker. The service reports queue depth,
+batch sizes and latency histograms.
+
+Usage:
+    python ocr_service.py [--host 127.0.0.1] [--port 8790]
+Clients on other machines set ECOURTS_OCR_ADDRESS=host:port and ECOURTS_OCR_AUTHKEY.
+"""
+
+import io
+import os
+import sys
+import time
+import queue
+import atexit
+import socket
+import secrets
+import logging
+import argparse
+import threading
+import subprocess
+from multiprocessing.connection import Listener, Client
+from PIL import Image, ImageOps
+import pytesseract
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8790
+OCR_CONFIG = '--psm 7 --oem 3'
+STACKED_OCR_CONFIG = '--psm 6 --oem 3'
+BATCH_WINDOW = 0.03
+MAX_BATCH = 16
+START_TIMEOUT = 15
+REQUEST_TIMEOUT = 30
+PROBE_TIMEOUT = 1
+RECONNECT_ATTEMPTS = 5
+# First bytes an authenticating multiprocessing.connection listener sends on accept
+CHALLENGE = b'#CHALLENGE#'
+
+
+def _probe(address):
+    """True if an authenticating listener answers at address (plain Client() could hang on anything else)"""
+    try:
+        with socket.create_connection(address, timeout=PROBE_TIMEOUT) as sock:
+            return CHALLENGE in sock.recv(64)
+    except OSError:
+        return False
+
+
+def _port_free(host, port):
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((host, port))
+        return True
+    except OSError:
+        return False
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def recognize_local(image_bytes):
+    """In-process OCR of one captcha, used when the service is unavailable"""
+    image = Image.open(io.BytesIO(image_bytes))
+    return pytesseract.image_to_string(image, config=OCR_CONFIG).strip()
+
+
+class TesseractEngine:
+    """pytesseract engine: stacks a batch into one image to pay for one process spawn"""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        self.stack_fallbacks = 0
+
+    def recognize(self, images):
+        if len(images) == 1:
+            return [pytesseract.image_to_string(images[0], config=OCR_CONFIG).strip()]
+        lines = [line.strip() for line in
+                 pytesseract.image_to_string(self._stack(images), config=STACKED_OCR_CONFIG).splitlines()]
+        lines = [line for line in lines if line]
+        if len(lines) == len(images):
+            return lines
+        # Lines merged or vanished: cannot tell which text belongs to which captcha
+        self.stack_fallbacks += 1
+        return [pytesseract.image_to_string(image, config=OCR_CONFIG).strip() for image in images]
+
+    @staticmethod
+    def _stack(images):
+        images = [ImageOps.expand(image.convert('L'), border=8, fill=255) for image in images]
+        gap = max(image.height for image in images) // 2
+        width = max(image.width for image in images)
+        stacked = Image.new('L', (width, sum(image.height + gap for image in images)), 255)
+        top = 0
+        for image in images:
+            stacked.paste(image, (0, top))
+            top += image.height + gap
+        return stacked
+
+
+class TesserocrEngine:
+    """tesserocr engine: the Tesseract API is initialised once and kept in memory"""
+
+    name = "tesserocr"
+
+    def __init__(self):
+        from tesserocr import PyTessBaseAPI, PSM
+        self.api = PyTessBaseAPI(psm=PSM.SINGLE_LINE)
+        self.stack_fallbacks = 0
+
+    def recognize(self, images):
+        results = []
+        for image in images:
+            self.api.SetImage(image)
+            results.append(self.api.GetUTF8Text().strip())
+        return results
+
+
+def load_engine():
+    """tesserocr if installed, else pytesseract"""
+    try:
+        return TesserocrEngine()
+    except Exception as e:
+        logger.info(f"tesserocr unavailable ({e}), using pytesseract")
+        return TesseractEngine()
+
+
+class _Request:
+    __slots__ = ("image_bytes", "enqueued", "done", "text")
+
+    def __init__(self, image_bytes):
+        self.image_bytes = image_bytes
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.text = ""
+
+
+class OCRServer:
+    """Accepts OCR requests from many clients and recognises them in batches"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, authkey=None, engine=None,
+                 batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.address = (host, port)
+        self.authkey = authkey
+        self.engine = engine or load_engine()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.batch_sizes = Histogram((1, 2, 3, 4, 6, 8, 12, 16, 32))
+        self.wait_time = Histogram()
+        self.ocr_time = Histogram()
+        self.latency = Histogram()
+
+    def serve_forever(self):
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"OCR service ({self.engine.name}) listening on {self.address[0]}:{self.address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Includes the unauthenticated probes clients make before connecting
+                    logger.debug(f"Rejected OCR client: {e}")
+                    continue
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if message[0] == 'ocr':
+                    request = _Request(message[1])
+                    self._queue.put(request)
+                    request.done.wait()
+                    conn.send(request.text)
+                elif message[0] == 'stats':
+                    conn.send(self.stats())
+                else:
+                    conn.send(None)
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            images = [Image.open(io.BytesIO(request.image_bytes)) for request in batch]
+            texts = self.engine.recognize(images)
+        except Exception as e:
+            logger.warning(f"OCR batch of {len(batch)} failed: {e}")
+            texts = [""] * len(batch)
+            with self._lock:
+                self.errors += 1
+        finished = time.perf_counter()
+        with self._lock:
+            self.requests += len(batch)
+            self.batch_sizes.observe(len(batch))
+            self.ocr_time.observe(finished - started)
+            for request, text in zip(batch, texts):
+                self.wait_time.observe(started - request.enqueued)
+                self.latency.observe(finished - request.enqueued)
+                request.text = text
+                request.done.set()
+
+    def stats(self):
+        """Queue depth, request counts, batch sizes and latency histograms"""
+        with self._lock:
+            return {
+                'engine': self.engine.name,
+                'queue_depth': self._queue.qsize(),
+                'requests': self.requests,
+                'errors': self.errors,
+                'stack_fallbacks': self.engine.stack_fallbacks,
+                'batch_size': self.batch_sizes.to_dict(),
+                'queue_wait_seconds': self.wait_time.to_dict(),
+                'ocr_seconds': self.ocr_time.to_dict(),
+                'latency_seconds': self.latency.to_dict(),
+            }
+
+
+class OCRClient:
+    """Thread-safe client of the OCR service; starts a local service on first use"""
+
+    def __init__(self, address=None, authkey=None, enabled=True):
+        configured = address or os.environ.get("ECOURTS_OCR_ADDRESS")
+        self.remote = bool(configured)
+        host, _, port = (configured or f"{DEFAULT_HOST}:{DEFAULT_PORT}").rpartition(":")
+        self.address = (host, int(port))
+        key = authkey or os.environ.get("ECOURTS_OCR_AUTHKEY")
+        self.authkey = key.encode() if isinstance(key, str) else key
+        self.enabled = enabled
+        self.process = None
+        self._atexit = False
+        self._failed = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self):
+        """Make sure a service is reachable, launching one locally if needed"""
+        if not self.enabled or self._failed:
+            return False
+        with self._lock:
+            if self.authkey is None and not self.remote:
+                # Only services started with our key are trusted; without it we always spawn our own
+                self.authkey = secrets.token_hex(16).encode()
+            elif self._connect():
+                return True
+            if self.remote:
+                self._failed = True
+                logger.warning(f"OCR service at {self.address} unreachable, using in-process OCR")
+                return False
+            if self.process is not None and self.process.poll() is None:
+                # Our service is still running; a second one would orphan it
+                return self._reconnect()
+            return self._start_local()
+
+    def _reconnect(self):
+        for _ in range(RECONNECT_ATTEMPTS):
+            if self._connect():
+                return True
+            time.sleep(0.2)
+        logger.warning("OCR service not answering, using in-process OCR for this captcha")
+        return False
+
+    def _start_local(self):
+        try:
+            self._spawn()
+        except Exception as e:
+            self._failed = True
+            logger.warning(f"OCR service did not start, using in-process OCR: {e}")
+            return False
+        return True
+
+    def _spawn(self):
+        if not _port_free(*self.address):
+            # Something else holds the port, e.g. a service left behind by a crashed app
+            self.address = (self.address[0], _free_port(self.address[0]))
+        env = {**os.environ, "ECOURTS_OCR_AUTHKEY": self.authkey.decode()}
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--host", self.address[0], "--port", str(self.address[1]),
+             "--tesseract-cmd", pytesseract.pytesseract.tesseract_cmd], env=env)
+        if not self._atexit:
+            atexit.register(self.stop)
+            self._atexit = True
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"exited with code {self.process.returncode}")
+            if self._connect():
+                logger.info(f"Started OCR service (pid {self.process.pid}) on port {self.address[1]}")
+                return
+            time.sleep(0.2)
+        raise RuntimeError("timed out waiting for the service")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if not _probe(self.address):
+            return None
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+            # A listener with our key could still be something else; require a stats reply
+            conn.send(('stats',))
+            if not conn.poll(PROBE_TIMEOUT * 5) or not isinstance(conn.recv(), dict):
+                raise ConnectionError("no stats reply")
+        except Exception as e:
+            logger.debug(f"OCR service at {self.address} rejected: {e}")
+            return None
+        self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _call(self, *message):
+        if not self.start():
+            return None
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            conn.send(message)
+            if not conn.poll(REQUEST_TIMEOUT):
+                raise TimeoutError("no reply")
+            return conn.recv()
+        except Exception as e:
+            logger.warning(f"OCR service request failed: {e}")
+            self._drop_connection()
+            return None
+
+    def recognize(self, image_bytes):
+        """Captcha text, or None if the service could not be reached"""
+        return self._call('ocr', image_bytes)
+
+    def stats(self):
+        """Service statistics, or None if unavailable"""
+        return self._call('stats')
+
+    def stop(self):
+        """Terminate a service started by this client"""
+        self._drop_connection()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+# Shared client used by every CaptchaHandler
+ocr_client = OCRClient()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared batching OCR service for captcha images")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tesseract-cmd", help="Path to tesseract binary")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW,
+                        help="Seconds to wait for more requests before running a batch")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract_cmd
+    authkey = os.environ.get("ECOURTS_OCR_AUTHKEY")
+    if not authkey:
+        parser.error("ECOURTS_OCR_AUTHKEY must be set")
+    server = OCRServer(args.host, args.port, authkey.encode(), batch_window=args.batch_window,
+                       max_batch=args.max_batch)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+eCourts Resource Blocker Module
+Blocks non-essential network resources in scraping browsers and reports requests and bytes saved
+"""
+
+import json
+import logging
+import threading
+from collections import Counter
+from fnmatch import fnmatch
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Images, fonts, media and third-party trackers are never needed for the form, captcha or result table
+BLOCKED_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*youtube.com*",
+]
+# Stylesheets hide modals and alerts; blocking them makes hidden "Invalid Captcha" alerts look visible
+STYLESHEET_PATTERNS = ["*.css"]
+# Representative URLs of the captcha endpoint and site scripts, which must always load.
+# CDP URL blocking has no exceptions, so a blocked pattern matching any of these is not applied.
+ESSENTIAL_URLS = [
+    "https://services.ecourts.gov.in/ecourtindia_v6/vendor/securimage/securimage_show.php?1234",
+    "https://services.ecourts.gov.in/ecourtindia_v6/js/main.js",
+    "https://services.ecourts.gov.in/ecourtindia_v6/js/jquery.min.js",
+]
+
+
+class ResourceBlocker:
+    """Applies CDP URL blocking to drivers and accumulates what was blocked"""
+
+    def __init__(self, blocked=None, essential_urls=None, block_stylesheets=False, enabled=True):
+        self.blocked = list(BLOCKED_PATTERNS if blocked is None else blocked)
+        if block_stylesheets:
+            self.blocked += STYLESHEET_PATTERNS
+        self.essential_urls = list(ESSENTIAL_URLS if essential_urls is None else essential_urls)
+        self.enabled = enabled
+        self.known_sizes = {}
+        self.blocked_urls = Counter()
+        self.stats = {'requests_loaded': 0, 'bytes_loaded': 0, 'requests_blocked': 0}
+        self._lock = threading.Lock()
+
+    def effective_patterns(self):
+        """Blocked patterns minus any that would block one of the essential URLs"""
+        patterns = []
+        for pattern in self.blocked:
+            hit = next((url for url in self.essential_urls if fnmatch(url, pattern)), None)
+            if hit:
+                logger.warning(f"Not blocking '{pattern}': it matches essential URL {hit}")
+                continue
+            patterns.append(pattern)
+        return patterns
+
+    def configure_options(self, options):
+        """Enable performance logging so blocked and loaded requests can be reported"""
+        if self.enabled:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        return options
+
+    def apply(self, driver):
+        """Install the blocklist on the driver's current target"""
+        if not self.enabled:
+            return False
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.effective_patterns()})
+            return True
+        except Exception as e:
+            logger.warning(f"Resource blocking unavailable: {e}")
+            return False
+
+    def collect(self, driver):
+        """Drain the driver's performance log and add request/byte counts to the report"""
+        if not self.enabled:
+            return {}
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return {}
+
+        urls, loaded, blocked, bytes_loaded = {}, 0, 0, 0
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                urls[params.get('requestId')] = params.get('request', {}).get('url', '')
+            elif method == 'Network.loadingFinished':
+                size = int(params.get('encodedDataLength', 0))
+                url = urls.get(params.get('requestId'))
+                loaded += 1
+                bytes_loaded += size
+                if url:
+                    with self._lock:
+                        self.known_sizes[url.split('?', 1)[0]] = size
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                url = urls.get(params.get('requestId'), '')
+                blocked += 1
+                if url:
+                    with self._lock:
+                        self.blocked_urls[url.split('?', 1)[0]] += 1
+
+        report = {'requests_loaded': loaded, 'bytes_loaded': bytes_loaded, 'requests_blocked': blocked}
+        with self._lock:
+            for key, value in report.items():
+                self.stats[key] += value
+        for key, value in report.items():
+            metrics.increment(key, value)
+        return report
+
+    def report(self):
+        """Totals collected so far, with bytes saved estimated from blocked URLs seen loading unblocked
+
+        Blocked hosts are never contacted for sizes; URLs that never loaded unblocked count as 0 bytes.
+        """
+        with self._lock:
+            report = dict(self.stats)
+            report['bytes_saved'] = sum(count * self.known_sizes.get(url, 0)
+                                        for url, count in self.blocked_urls.items())
+        return report
+
+    def reset(self):
+        """Clear totals but keep learned resource sizes"""
+        with self._lock:
+            self.stats = {key: 0 for key in self.stats}
+            self.blocked_urls = Counter()
+
+
+# Shared blocker used by all scraping browsers
+resource_blocker = ResourceBlocker()
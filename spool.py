@@ -0,0 +1,134 @@
+"""
+eCourts Spool Module
+Disk-backed NDJSON spools that keep rows and per-court results out of memory in large runs
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Rows kept in memory before a cause list spills to disk
+SPILL_ROWS = 500
+SPOOL_DIR = Path(tempfile.gettempdir()) / "ecourts_spool"
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class RowSpool:
+    """Append-only list of table rows that moves to an NDJSON temp file once it grows
+
+    Behaves like the table_data list it replaces for the operations callers use:
+    iteration (repeatable), len() and truthiness.
+    """
+
+    def __init__(self, spill_rows=SPILL_ROWS, spool_dir=SPOOL_DIR):
+        self.spill_rows = spill_rows
+        self.spool_dir = Path(spool_dir)
+        self.data_rows = 0
+        self._rows = []
+        self._count = 0
+        self._path = None
+        self._file = None
+        self._finalizer = None
+
+    def append(self, row):
+        self._count += 1
+        if row['type'] == 'data':
+            self.data_rows += 1
+        if self._file is None:
+            self._rows.append(row)
+            if len(self._rows) >= self.spill_rows:
+                self._spill()
+            return
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _spill(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        fd, self._path = tempfile.mkstemp(prefix="rows_", suffix=".ndjson", dir=self.spool_dir)
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        self._finalizer = weakref.finalize(self, _unlink, self._path)
+        for row in self._rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._rows = []
+
+    @property
+    def spilled(self):
+        return self._path is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        if self._file is None:
+            yield from self._rows
+            return
+        self._file.flush()
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        """Delete the temp file; the spool is empty afterwards"""
+        if self._file is not None:
+            self._file.close()
+            self._finalizer()
+            self._file = self._path = None
+        self._rows = []
+        self._count = self.data_rows = 0
+
+
+class ResultSpool:
+    """Per-court result dicts appended to an NDJSON file; only counters stay in memory"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.total = 0
+        self.success = 0
+
+    @property
+    def failed(self):
+        return self.total - self.success
+
+    def append(self, result):
+        with self._lock:
+            self._file.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            self.total += 1
+            if result.get('status') == 'success':
+                self.success += 1
+
+    def __iter__(self):
+        return self.iter()
+
+    def iter(self, status=None):
+        """Stream results back from disk, optionally only those with one status"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                result = json.loads(line)
+                if status is None or result.get('status') == status:
+                    yield result
+
+    def failures(self):
+        """Results whose status is not 'success'"""
+        return (result for result in self if result.get('status') != 'success')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,171 @@
+"""
+eCourts Tab Pool Module
+Runs several isolated eCourts sessions as tabs of one browser and schedules courts onto them
+"""
+
+import time
+import queue
+import logging
+import weakref
+import threading
+from browser_tabs import TabBrowser
+from court_runner import (ECOURTS_URL, OUTPUT_DIR, RETRY_ERROR, create_new_driver,
+                          run_court, run_court_split, finish_court)
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TabPool:
+    """Schedules courts onto tabs spread over a small number of browsers"""
+
+    def __init__(self, browsers=1, tabs_per_browser=3, url=ECOURTS_URL, output_dir=OUTPUT_DIR,
+                 split_case_types=False, job=None):
+        self.job = job
+        self.browser_count = browsers
+        self.tabs_per_browser = tabs_per_browser
+        self.url = url
+        self.output_dir = output_dir
+        self.split_case_types = split_case_types
+        self.browsers = []
+        self._idle = queue.Queue()
+        # Dead browser -> its replacement; weak keys, since ids are reused after garbage collection
+        self._replacements = weakref.WeakKeyDictionary()
+        self._slots = 0
+        self._lock = threading.Lock()
+        self._pair_lock = threading.Lock()
+
+    @property
+    def tabs_per_court(self):
+        return 2 if self.split_case_types else 1
+
+    @property
+    def size(self):
+        """Number of courts that can run at once"""
+        return max(1, self._idle.qsize() // self.tabs_per_court)
+
+    def start(self):
+        """Launch browsers and open their tabs"""
+        for _ in range(supervisor.max_workers(self.browser_count)):
+            browser = self._launch()
+            if browser:
+                for tab in browser.tabs:
+                    self._idle.put(tab)
+        if not self.browsers:
+            raise RuntimeError("Driver creation failed")
+        self._slots = self._idle.qsize()
+        if self.split_case_types and self._idle.qsize() < 2:
+            logger.warning("Not enough isolated tabs to split case types, fetching sequentially")
+            self.split_case_types = False
+        return self
+
+    def _launch(self, tabs=None):
+        driver = create_new_driver(job=self.job)
+        if not driver:
+            return None
+        browser = TabBrowser(driver)
+        for _ in range(tabs or self.tabs_per_browser):
+            if browser.open_tab() is None:
+                logger.warning("Tab isolation unavailable, using one tab for this browser")
+                break
+        self.browsers.append(browser)
+        return browser
+
+    def process_court(self, court_info, selected_date, max_retries=3):
+        """Process one court on the next free tab - retry 3 times on failure"""
+        start = time.perf_counter()
+        # Pairs are taken under a lock so two workers never each hold half a pair
+        with self._pair_lock:
+            tabs = self._acquire()
+        if tabs is None:
+            result = {'status': 'error', 'court': court_info['court_name'], 'error': "No browser available"}
+            return finish_court(court_info, result, start, max_retries)
+        result = None
+        try:
+            for attempt in range(1, max_retries + 1):
+                try:
+                    if len(tabs) == 2:
+                        result = run_court_split([tab.driver for tab in tabs], court_info, selected_date,
+                                                 self.url, self.output_dir)
+                    else:
+                        result = run_court(tabs[0].driver, court_info, selected_date, self.url, self.output_dir)
+                    if result:
+                        result['attempts'] = attempt
+                        break
+                except Exception as e:
+                    metrics.increment("court_exceptions")
+                    logger.warning(f"{court_info['court_name']} attempt {attempt} failed in tab: {e}")
+                tabs = [self._recover(tab) for tab in tabs]
+                if None in tabs:
+                    break
+                if attempt < max_retries:
+                    time.sleep(1)
+        finally:
+            lost = tabs.count(None)
+            if lost:
+                with self._lock:
+                    self._slots -= lost
+                logger.error(f"Could not launch a browser, {self._slots} tab(s) left in the pool")
+                tabs = [tab for tab in tabs if tab is not None]
+            # Drain the performance log per court; it grows inside chromedriver until read
+            for tab in {tab.browser: tab for tab in tabs}.values():
+                resource_blocker.collect(tab.driver)
+            for tab in tabs:
+                self._idle.put(tab)
+        if not result:
+            result = {'status': 'error', 'court': court_info['court_name'], 'error': RETRY_ERROR}
+        return finish_court(court_info, result, start, max_retries)
+
+    def _acquire(self):
+        """Take the tabs for one court; None once the pool has lost too many of them"""
+        tabs = []
+        while len(tabs) < self.tabs_per_court:
+            try:
+                tabs.append(self._idle.get(timeout=1))
+            except queue.Empty:
+                if self._slots < self.tabs_per_court:
+                    for tab in tabs:
+                        self._idle.put(tab)
+                    return None
+        return tabs
+
+    def _recover(self, tab):
+        """Return a working tab after an error: same tab, a new tab, or a tab on a new browser
+
+        Returns None if no browser could be launched; the slot is then dropped from the pool.
+        """
+        browser = tab.browser
+        if browser.alive():
+            if tab.alive():
+                return tab
+            # replace_tab has closed the crashed tab, so it must not go back into the queue
+            return browser.replace_tab(tab) or self._relaunch()
+        with self._lock:
+            replacement = self._replacements.get(browser)
+            if replacement is None:
+                metrics.increment("tab_browsers_restarted")
+                supervisor.release(browser.driver)
+                if browser in self.browsers:
+                    self.browsers.remove(browser)
+                # Start with one tab; the dead browser's other tabs are replaced as they fail
+                replacement = self._launch(tabs=1)
+                self._replacements[browser] = replacement
+                if replacement:
+                    return replacement.tabs[0]
+        new_tab = replacement.open_tab() if replacement and replacement.alive() else None
+        return new_tab or self._relaunch()
+
+    def _relaunch(self):
+        """Give a slot whose tab cannot be replaced its own one-tab browser"""
+        metrics.increment("tab_browsers_launched")
+        browser = self._launch(tabs=1)
+        return browser.tabs[0] if browser and browser.tabs else None
+
+    def close(self):
+        """Quit every browser of the pool"""
+        for browser in self.browsers:
+            resource_blocker.collect(browser.driver)
+            supervisor.release(browser.driver)
+        self.browsers = []
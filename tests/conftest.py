@@ -0,0 +1,81 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from selenium.webdriver.chromium.webdriver import ChromiumDriver
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.locator_converter import LocatorConverter
+from selenium.webdriver.remote.shadowroot import ShadowRoot
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.remote.webelement import WebElement
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class FakeExecutor:
+    """Command executor of a browser with several windows, each with its own page state
+
+    Like Chrome, element and script commands act on the active window. Every command
+    that is not a window switch is logged with the element it targets and the window it ran in.
+    """
+
+    def __init__(self, pages=None):
+        self.active = "blank"
+        self.pages = pages or {}
+        self.log = []
+
+    def _page(self):
+        return self.pages.setdefault(self.active, {})
+
+    def execute(self, command, params):
+        time.sleep(0.0001)  # a round trip, so other tabs get to run in between
+        if command == Command.SWITCH_TO_WINDOW:
+            self.active = params['handle']
+            return {'value': None}
+        if command == Command.W3C_GET_CURRENT_WINDOW_HANDLE:
+            return {'value': self.active}
+        if command == Command.FIND_ELEMENT:
+            # Elements remember the window they were found in: "<window>:<id>"
+            name = params['value'].split('"')[1] if '"' in params['value'] else params['value']
+            return {'value': {ELEMENT_KEY: f"{self.active}:{name}"}}
+
+        element = params.get('id')
+        args = params.get('args') or []
+        if args and isinstance(args[0], dict):
+            element = args[0].get(ELEMENT_KEY)
+        self.log.append((command, element, self.active))
+        field = element.split(":", 1)[1] if element else None
+        page = self._page()
+        if command == Command.SEND_KEYS_TO_ELEMENT:
+            page[field] = page.get(field, "") + params['text']
+        elif command == Command.GET_ELEMENT_TEXT:
+            return {'value': page.get(field, "")}
+        elif command == Command.W3C_EXECUTE_SCRIPT and field:
+            if "getAttribute" in params['script']:
+                return {'value': page.get(field, "")}
+            if ".value = ''" in params['script']:
+                page[field] = ""
+        return {'value': None}
+
+
+@pytest.fixture
+def fake_driver():
+    """Factory for a ChromiumDriver talking to a FakeExecutor instead of chromedriver"""
+    def create(pages=None):
+        driver = object.__new__(ChromiumDriver)
+        driver.command_executor = FakeExecutor(pages)
+        driver.session_id = "session"
+        driver.error_handler = ErrorHandler()
+        driver.caps = {}
+        driver.locator_converter = LocatorConverter()
+        driver._is_remote = False
+        driver._web_element_cls = WebElement
+        driver._shadowroot_cls = ShadowRoot
+        driver._websocket_connection = None
+        driver._switch_to = SwitchTo(driver)
+        return driver
+    return create
@@ -0,0 +1,44 @@
+"""Tab drivers must keep every command, including element commands, on their own window"""
+
+import threading
+from selenium.webdriver.common.by import By
+from browser_tabs import TabBrowser, BrowserTab
+
+
+def test_elements_are_bound_to_their_tab(fake_driver):
+    browser = TabBrowser(fake_driver())
+    tab1, tab2 = BrowserTab(browser, "tab1", None), BrowserTab(browser, "tab2", None)
+
+    captcha1 = tab1.driver.find_element(By.ID, "captcha")
+    captcha2 = tab2.driver.find_element(By.ID, "captcha")
+    assert captcha1.parent is tab1.driver
+    assert tab1.driver.switch_to._driver == tab1.driver
+
+    # tab2 is the active window now; tab1's element must switch back before typing
+    captcha1.send_keys("abc")
+    captcha2.send_keys("xyz")
+    captcha1.click()
+
+    log = browser.driver.command_executor.log
+    assert [(element, window) for _, element, window in log] == [
+        ("tab1:captcha", "tab1"), ("tab2:captcha", "tab2"), ("tab1:captcha", "tab1")]
+
+
+def test_concurrent_element_commands_stay_in_their_tab(fake_driver):
+    browser = TabBrowser(fake_driver())
+    tabs = [BrowserTab(browser, f"tab{i}", None) for i in range(2)]
+
+    def work(tab):
+        for _ in range(100):
+            tab.driver.find_element(By.ID, "captcha").send_keys("x")
+
+    threads = [threading.Thread(target=work, args=(tab,)) for tab in tabs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    log = browser.driver.command_executor.log
+    assert len(log) == 200
+    assert {window for _, _, window in log} == {"tab0", "tab1"}
+    assert all(element.split(":")[0] == window for _, element, window in log)
@@ -0,0 +1,27 @@
+"""Civil and criminal sessions of split mode share one browser but never each other's page"""
+
+import concurrent.futures
+from selenium.webdriver.common.by import By
+from browser_tabs import TabBrowser, BrowserTab
+from captcha_handler import CaptchaHandler
+
+
+def test_split_sessions_keep_captcha_and_table_apart(fake_driver):
+    pages = {"civ": {"dispTable": "civil cases"}, "cri": {"dispTable": "criminal cases"}}
+    browser = TabBrowser(fake_driver(pages))
+    tabs = {case_type: BrowserTab(browser, case_type, None) for case_type in pages}
+
+    def fetch(case_type, captcha):
+        driver = tabs[case_type].driver
+        entered = CaptchaHandler(driver, ocr_client=object()).enter_captcha(captcha)
+        return entered, driver.find_element(By.ID, "dispTable").text
+
+    # Same thread pool as run_court_split, one session per case type
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        civil = executor.submit(fetch, "civ", "c1v1l")
+        criminal = executor.submit(fetch, "cri", "cr1m")
+        assert civil.result() == (True, "civil cases")
+        assert criminal.result() == (True, "criminal cases")
+
+    assert pages["civ"]["cause_list_captcha_code"] == "c1v1l"
+    assert pages["cri"]["cause_list_captcha_code"] == "cr1m"
@@ -0,0 +1,361 @@
+"""
+eCourts Watcher
+Polls configured courts and dates through the day and emits only cause lists that changed
+
+Each poll hashes the extracted rows. When the hash differs from the last poll the PDF is
+re-rendered (and the search index updated) and a row-level diff (added, removed, moved
+and changed matters) is written to ecourts_pdfs/watch/. Polls are limited by a per-hour
+budget that is kept in the watch state, so it also holds across cron-driven --once runs.
+
+Usage:
+    python watcher.py watch.json [--once]
+
+Example watch.json:
+    {
+        "interval_minutes": 30,
+        "max_fetches_per_hour": 20,
+        "dates": ["today", "+1"],
+        "courts": [
+            {"state_code": "3", "dist_code": "1", "complex_code": "1030134",
+             "court_value": "1^2", "court_name": "Principal Civil Judge"},
+            {"state_code": "3", "dist_code": "1", "complex_code": "1030135"}
+        ]
+    }
+A court entry without court_value expands to every court of that complex.
+"""
+
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from dropdown_manager import DropdownManager
+from court_runner import (ECOURTS_URL, OUTPUT_DIR, create_new_driver, fetch_court,
+                          write_court_pdf, safe_pdf_path)
+from browser_supervisor import supervisor
+from resource_blocker import resource_blocker
+from metrics import metrics
+from case_index import case_index
+
+logger = logging.getLogger(__name__)
+
+WATCH_DIR = OUTPUT_DIR / "watch"
+DEFAULT_INTERVAL_MINUTES = 30
+DEFAULT_MAX_FETCHES_PER_HOUR = 20
+BUDGET_KEY = "_budget"
+
+
+class PollingBudget:
+    """Token bucket limiting how many court fetches may start per hour
+
+    Uses wall-clock time so the bucket can be saved and restored between --once runs.
+    """
+
+    def __init__(self, max_per_hour, tokens=None, updated=None):
+        self.capacity = max(1, max_per_hour)
+        self.tokens = float(self.capacity if tokens is None else min(tokens, self.capacity))
+        self.rate = self.capacity / 3600.0
+        self.updated = time.time() if updated is None else min(updated, time.time())
+
+    def _refill(self):
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def to_dict(self):
+        return {'tokens': self.tokens, 'updated': self.updated}
+
+    def try_take(self):
+        """Consume one fetch if available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        """Seconds until the next fetch is allowed"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def resolve_date(spec, today=None):
+    """'today', 'tomorrow', '+N' / '-N' days, or an ISO date"""
+    today = today or date.today()
+    spec = str(spec).strip().lower()
+    if spec == 'today':
+        return today
+    if spec == 'tomorrow':
+        return today + timedelta(days=1)
+    if spec[:1] in '+-' and spec[1:].isdigit():
+        return today + timedelta(days=int(spec))
+    return date.fromisoformat(spec)
+
+
+def normalize_rows(case_data):
+    """Rows of one case type as [stage, serial, case_no, parties, advocate] lists"""
+    if not case_data or not case_data[1]:
+        return []
+    rows, stage = [], ''
+    for row in case_data[1]:
+        if row['type'] == 'header':
+            stage = row['text']
+            continue
+        cells = (row['cells'] + [''] * 4)[:4]
+        if any(ch.isdigit() for ch in cells[0]):
+            rows.append([stage] + cells)
+    return rows
+
+
+def hash_rows(rows_by_type):
+    """Stable hash of the normalized rows of all case types"""
+    payload = json.dumps(rows_by_type, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def diff_rows(old_rows, new_rows):
+    """Row-level diff keyed by case number
+
+    Returns:
+        dict: 'added' and 'removed' rows, 'moved' entries whose serial or stage changed,
+        and 'changed' entries whose parties or advocate changed
+    """
+    def keyed(rows):
+        result = {}
+        for row in rows:
+            key = row[2] or "|".join(row)
+            while key in result:  # same case listed twice
+                key += "#"
+            result[key] = row
+        return result
+
+    old, new = keyed(old_rows), keyed(new_rows)
+    common = old.keys() & new.keys()
+    moved = [{'case_no': new[key][2], 'from': {'stage': old[key][0], 'serial': old[key][1]},
+              'to': {'stage': new[key][0], 'serial': new[key][1]}}
+             for key in common if old[key][:2] != new[key][:2]]
+    changed = [{'case_no': new[key][2], 'from': old[key], 'to': new[key]}
+               for key in common if old[key][3:] != new[key][3:]]
+    return {
+        'added': sorted((new[key] for key in new.keys() - old.keys()), key=lambda row: serial_key(row[1])),
+        'removed': sorted((old[key] for key in old.keys() - new.keys()), key=lambda row: serial_key(row[1])),
+        'moved': sorted(moved, key=lambda m: serial_key(m['to']['serial'])),
+        'changed': sorted(changed, key=lambda c: serial_key(c['to'][1])),
+    }
+
+
+def serial_key(serial):
+    """Sort key ordering serial numbers numerically ('9' before '10')"""
+    digits = ''.join(ch for ch in serial if ch.isdigit())
+    return (int(digits) if digits else float('inf'), serial)
+
+
+class CauseListWatcher:
+    """Re-fetches configured courts on a schedule and reports changed lists"""
+
+    def __init__(self, courts, dates, interval_minutes=DEFAULT_INTERVAL_MINUTES,
+                 max_fetches_per_hour=DEFAULT_MAX_FETCHES_PER_HOUR, url=ECOURTS_URL, watch_dir=WATCH_DIR):
+        self.courts = courts
+        self.dates = dates
+        self.interval = interval_minutes * 60
+        self.url = url
+        self.watch_dir = Path(watch_dir)
+        self.state_path = self.watch_dir / "state.json"
+        self.state = json.loads(self.state_path.read_text(encoding='utf-8')) if self.state_path.exists() else {}
+        # Bucket and poll times live in state.json so cron-driven --once runs share the budget
+        self.budget = PollingBudget(max_fetches_per_hour, **self.state.get(BUDGET_KEY, {}))
+        self.driver = None
+
+    # ---------- browser ----------
+    def _driver(self):
+        if self.driver is None:
+            self.driver = create_new_driver()
+        return self.driver
+
+    def _drop_driver(self):
+        if self.driver:
+            resource_blocker.collect(self.driver)
+            supervisor.release(self.driver)
+            self.driver = None
+
+    def expand_courts(self):
+        """Replace complex-only entries by one entry per court of that complex"""
+        expanded = []
+        for entry in self.courts:
+            if entry.get('court_value'):
+                expanded.append(entry)
+                continue
+            driver = self._driver()
+            if not driver:
+                raise RuntimeError("Driver creation failed")
+            driver.get(self.url)
+            time.sleep(2)
+            manager = DropdownManager(driver)
+            manager.get_districts(entry['state_code'])
+            manager.get_complexes(entry['dist_code'])
+            for court_name, court_value in manager.get_courts(entry['complex_code']).items():
+                expanded.append({**entry, 'court_value': court_value, 'court_name': court_name})
+        self.courts = expanded
+        return expanded
+
+    # ---------- scheduling ----------
+    def targets(self):
+        """(key, court_info, date) for every configured court and resolved date, least recently polled first"""
+        targets = []
+        for court_info in self.courts:
+            for spec in self.dates:
+                day = resolve_date(spec)
+                key = f"{court_info['complex_code']}|{court_info['court_value']}|{day.isoformat()}"
+                targets.append((key, court_info, day))
+        return sorted(targets, key=lambda target: self._polled_at(target[0]))
+
+    def _polled_at(self, key):
+        return self.state.get(key, {}).get('polled_at', 0)
+
+    def run(self, once=False):
+        """Poll until interrupted, or one round with once=True
+
+        With once=True targets are skipped while their interval has not passed and the
+        round stops when the budget is exhausted; the remaining targets go first next run.
+        """
+        try:
+            while True:
+                self._prune_state()
+                for key, court_info, day in self.targets():
+                    if time.time() < self._polled_at(key) + self.interval:
+                        continue
+                    while not self.budget.try_take():
+                        metrics.increment("watch_budget_waits")
+                        if once:
+                            logger.info("Polling budget exhausted, stopping this round")
+                            self._save_state()
+                            return
+                        wait = self.budget.wait_time()
+                        logger.info(f"Polling budget exhausted, waiting {wait:.0f}s")
+                        time.sleep(wait)
+                    self.state.setdefault(key, {})['polled_at'] = time.time()
+                    self._save_state()
+                    self.poll(key, court_info, day)
+                if once:
+                    return
+                due = min((self._polled_at(key) + self.interval for key, _, _ in self.targets()),
+                          default=time.time())
+                time.sleep(max(1.0, due - time.time()))
+        finally:
+            self._drop_driver()
+
+    def _prune_state(self):
+        """Forget dates that have passed; their rows would otherwise stay in state.json forever"""
+        today = date.today().isoformat()
+        for key in [key for key in self.state if key != BUDGET_KEY and key.rsplit('|', 1)[-1] < today]:
+            del self.state[key]
+
+    # ---------- polling ----------
+    def poll(self, key, court_info, day):
+        """Fetch one court and date; emit a diff if its rows changed
+
+        Returns:
+            dict: Diff record if the list changed, otherwise None
+        """
+        metrics.increment("watch_polls")
+        driver = self._driver()
+        if not driver:
+            return None
+        try:
+            with metrics.timed("watch_fetch"):
+                fetched = fetch_court(driver, court_info, day, self.url)
+            # The performance log grows inside chromedriver until read
+            resource_blocker.collect(driver)
+        except Exception as e:
+            logger.warning(f"Watch fetch failed for {court_info['court_name']}: {e}")
+            self._drop_driver()
+            return None
+        # Failed navigation returns None and a case type whose captcha failed None; that would
+        # look like an emptied list, so the poll is dropped and retried next interval. An empty
+        # list extracts as (None, None) or without a table and is hashed like any other.
+        if fetched is None or any(data is None for data in fetched):
+            metrics.increment("watch_failed_fetches")
+            logger.warning(f"Incomplete data for {court_info['court_name']} on {day}, retrying next interval")
+            return None
+
+        civil_data, criminal_data = fetched
+        previous = self.state.get(key, {})
+        rows = {'civ': normalize_rows(civil_data), 'cri': normalize_rows(criminal_data)}
+        digest = hash_rows(rows)
+        now = datetime.now().isoformat(timespec='seconds')
+
+        if previous.get('hash') == digest:
+            previous['checked_at'] = now
+            self._save_state()
+            return None
+
+        metrics.increment("watch_changes")
+        result = write_court_pdf(civil_data, criminal_data, court_info, day, self.watch_dir / "pdfs")
+        record = {
+            'court': court_info['court_name'], 'complex_code': court_info['complex_code'],
+            'court_value': court_info['court_value'], 'date': day.isoformat(), 'detected_at': now,
+            'initial': 'hash' not in previous, 'file': result['file'] if result else None,
+            'changes': {case_type: diff_rows(previous.get('rows', {}).get(case_type, []), rows[case_type])
+                        for case_type in rows},
+        }
+        self._emit(record)
+        self.state[key] = {**previous, 'hash': digest, 'rows': rows, 'checked_at': now, 'changed_at': now}
+        self._save_state()
+        return record
+
+    def _emit(self, record):
+        diff_dir = self.watch_dir / "diffs"
+        diff_dir.mkdir(parents=True, exist_ok=True)
+        stamp = record['detected_at'].replace(':', '')
+        name = safe_pdf_path(record['court'], date.fromisoformat(record['date'])).stem
+        (diff_dir / f"{name}_{stamp}.json").write_text(json.dumps(record, indent=2, ensure_ascii=False),
+                                                      encoding='utf-8')
+        with open(self.watch_dir / "changes.ndjson", "a", encoding='utf-8') as log:
+            log.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        counts = {case_type: {kind: len(items) for kind, items in diff.items()}
+                  for case_type, diff in record['changes'].items()}
+        label = "baseline" if record['initial'] else "CHANGED"
+        print(f"[{record['detected_at']}] {label}: {record['court']} {record['date']} {counts}")
+
+    def _save_state(self):
+        self.state[BUDGET_KEY] = self.budget.to_dict()
+        self.watch_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False), encoding='utf-8')
+        tmp.replace(self.state_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch eCourts cause lists and report changes")
+    parser.add_argument("config", help="JSON file with courts, dates, interval and polling budget")
+    parser.add_argument("--once", action="store_true", help="Poll every target once and exit")
+    parser.add_argument("--url", help="Override the cause list URL (e.g. the mock server); "
+                                      "changed lists are then not added to the search index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config = json.loads(Path(args.config).read_text(encoding='utf-8'))
+    url = args.url or config.get('url', ECOURTS_URL)
+    case_index.enabled = url == ECOURTS_URL
+    watcher = CauseListWatcher(
+        config['courts'], config.get('dates', ['today']),
+        config.get('interval_minutes', DEFAULT_INTERVAL_MINUTES),
+        config.get('max_fetches_per_hour', DEFAULT_MAX_FETCHES_PER_HOUR),
+        url)
+    supervisor.reap_orphans()
+    watcher.expand_courts()
+    print(f"Watching {len(watcher.courts)} court(s) x {len(watcher.dates)} date(s), "
+          f"every {watcher.interval // 60} min, max {watcher.budget.capacity} fetches/hour")
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())